@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Deterministic data generator for the termgraph benchmarks.
+
+Writes data files in the termgraph text format. The same seed always
+gives the same file, so timings are comparable across runs and machines.
+
+    python benchmarks/generate.py out.dat --rows 10000 --categories 4
+    python benchmarks/generate.py cal.dat --rows 365 --kind dates
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+
+# numbers: short labels and values in [-500, 500)
+# wide: labels of about 40 characters, some of them wide (CJK) ones
+# dates: a yyyy-mm-dd label per day from START, positive values
+KINDS = ['numbers', 'wide', 'dates']
+
+START = date(2015, 1, 1)
+
+
+def labels(count, kind='numbers', seed=0):
+    """Return count labels of the given kind."""
+    rng = random.Random(seed)
+    if kind == 'dates':
+        return [(START + timedelta(days=i)).isoformat() for i in range(count)]
+    if kind == 'wide':
+        return ['{}-{:08d}-{}'.format(
+            rng.choice(['node', 'service', 'région', '服务器']),
+            i, 'x' * rng.randint(10, 30)) for i in range(count)]
+    return ['r{}'.format(i) for i in range(count)]
+
+
+def rows(count, categories=1, kind='numbers', seed=0):
+    """Yield count (label, values) rows.
+
+    Numbers include negatives, dates only positive values as the calendar
+    expects."""
+    rng = random.Random(seed)
+    low = 0 if kind == 'dates' else -500
+    for label in labels(count, kind, seed):
+        yield label, [round(rng.uniform(low, 500), 2)
+                      for _ in range(categories)]
+
+
+def write(path, count, categories=1, kind='numbers', seed=0):
+    """Write a data file with a category line when there are several."""
+    with open(path, 'w') as f:
+        f.write('# generated: {} rows, {} categories, {}, seed {}\n'
+                .format(count, categories, kind, seed))
+        if categories > 1:
+            f.write('@ ' + ','.join('c{}'.format(j)
+                                    for j in range(categories)) + '\n')
+        for label, values in rows(count, categories, kind, seed):
+            f.write(label + ',' + ','.join(map(str, values)) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='file to write')
+    parser.add_argument('--rows', type=int, default=1000,
+                        help='number of rows default:1000')
+    parser.add_argument('--categories', type=int, default=1,
+                        help='number of values per row default:1')
+    parser.add_argument('--kind', choices=KINDS, default='numbers',
+                        help='kind of labels and values default:numbers')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed default:0')
+    args = parser.parse_args()
+    write(args.path, args.rows, args.categories, args.kind, args.seed)
+
+
+if __name__ == '__main__':
+    main()
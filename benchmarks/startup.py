@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Startup benchmark for termgraph.
+
+Measures the cumulative import time of termgraph.termgraph with
+python -X importtime, and the wall time of `termgraph --version`.
+Exits with status 1 when the median import time is over the budget or
+when a module which should be imported lazily is loaded at startup.
+
+    python benchmarks/startup.py --budget-ms 15 --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules which must only be imported by the features that need them.
+LAZY_MODULES = ['argparse', 'colorama', 'datetime', 'unicodedata', 'select',
+                'shutil', 'numpy']
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def environment():
+    """Return the environment for the child interpreters."""
+    env = dict(os.environ)
+    # Measure with bytecode cached, like an installed package.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def import_time(env):
+    """Return the cumulative import time of termgraph.termgraph in us."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import termgraph.termgraph'],
+        env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == 'termgraph.termgraph':
+            return int(fields[1])
+    raise RuntimeError('termgraph.termgraph not found in importtime output')
+
+
+def version_time(env):
+    """Return the wall time of `termgraph --version` in us."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'termgraph.termgraph', '--version'],
+                   env=env, stdout=subprocess.DEVNULL, check=True)
+    return int((time.perf_counter() - start) * 1e6)
+
+
+def eager_modules(env):
+    """Return the lazy modules which are loaded by importing termgraph."""
+    code = ('import sys, termgraph.termgraph; '
+            'print(" ".join(m for m in {!r} if m in sys.modules))'
+            .format(LAZY_MODULES))
+    result = subprocess.run([sys.executable, '-c', code], env=env,
+                            stdout=subprocess.PIPE, universal_newlines=True,
+                            check=True)
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='number of measured runs default:10')
+    parser.add_argument('--budget-ms', type=float, default=15.0,
+                        help='median import time allowed default:15')
+    args = parser.parse_args()
+
+    env = environment()
+    # Warm up, so the bytecode is compiled and cached.
+    import_time(env)
+
+    imports = [import_time(env) for _ in range(args.runs)]
+    versions = [version_time(env) for _ in range(args.runs)]
+    median = statistics.median(imports)
+    print('import termgraph.termgraph: median {:.2f} ms, min {:.2f} ms'
+          .format(median / 1000, min(imports) / 1000))
+    print('termgraph --version:        median {:.2f} ms, min {:.2f} ms'
+          .format(statistics.median(versions) / 1000, min(versions) / 1000))
+
+    failed = False
+    eager = eager_modules(env)
+    if eager:
+        print('FAIL: imported at startup: ' + ', '.join(eager))
+        failed = True
+    if median > args.budget_ms * 1000:
+        print('FAIL: import time over the {} ms budget'.format(args.budget_ms))
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
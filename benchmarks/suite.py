@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Benchmark suite for termgraph.
+
+Times parsing, normalize, each renderer and end to end command line
+runs over generated data (see generate.py) of several sizes and category
+counts. Results are written as JSON and compared with a baseline, by
+default the one stored in benchmarks/baseline.json; the exit status is 1
+when a benchmark is slower than the baseline by more than the tolerance.
+Baselines are only comparable on the machine which saved them.
+
+    python benchmarks/suite.py --save benchmarks/baseline.json
+    python benchmarks/suite.py --compare
+    python benchmarks/suite.py --full --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import generate  # noqa: E402
+from termgraph import termgraph as tg  # noqa: E402
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+SIZES = [10 ** 2, 10 ** 3, 10 ** 4]
+FULL_SIZES = [10 ** n for n in range(2, 8)]
+CATEGORIES = [1, 4, 16]
+
+# Largest input each benchmark is run with. The vertical chart is as wide
+# as the input and the calendar covers a few years of days.
+LIMITS = {'vertical': 10 ** 4, 'calendar': 10 ** 4}
+
+# Differences under this many seconds are noise, never regressions.
+MIN_DELTA = 0.002
+
+
+class Null(object):
+    """Output which discards everything, so only rendering is timed."""
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def best_of(function, repeat):
+    """Return the lowest wall time of repeat calls of function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def render(data, categories, **options):
+    """Return a function rendering data to Null."""
+    return lambda: tg.render(data.labels, data, categories, out=Null(),
+                             **options)
+
+
+def cases(path, date_path, wide_path, count, width):
+    """Yield (name, function) for every benchmark of one dataset."""
+    args = tg.init_args([path, '--jobs', '1'])
+    categories, data = tg.load_data(args)
+
+    yield 'parse', lambda: tg.load_data(args)
+    yield 'normalize', lambda: list(tg.normalize(data, 50))
+    yield 'horizontal', render(data, categories)
+    if width > 1:
+        # A single category isn't drawn stacked.
+        yield 'stacked', render(data, categories, stacked=True,
+                                color=list(tg.AVAILABLE_COLORS)[:1] * width)
+    yield 'different_scale', render(data, categories, different_scale=True)
+    if count <= LIMITS['vertical']:
+        yield 'vertical', render(data, categories, vertical=True)
+    if width == 1:
+        # Long labels, some of them double width.
+        _, wide = tg.load_data(tg.init_args([wide_path, '--jobs', '1']))
+        yield 'wide_labels', render(wide, [])
+    if width == 1 and count <= LIMITS['calendar']:
+        _, days = tg.load_data(tg.init_args([date_path, '--jobs', '1']))
+        yield 'calendar', render(days, [], calendar=True,
+                                 start_dt=generate.START.isoformat(),
+                                 end_dt=days.labels[-1])
+    yield 'cli', lambda: subprocess.run(
+        [sys.executable, '-m', 'termgraph.termgraph', path],
+        cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+
+
+def run(sizes, widths, repeat, only=None):
+    """Run the benchmarks and return a list of result dicts."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            date_path = os.path.join(directory, 'dates.dat')
+            generate.write(date_path, min(count, LIMITS['calendar']),
+                           kind='dates')
+            wide_path = os.path.join(directory, 'wide.dat')
+            generate.write(wide_path, count, kind='wide')
+            for width in widths:
+                path = os.path.join(directory, 'data.dat')
+                generate.write(path, count, width)
+                for name, function in cases(path, date_path, wide_path,
+                                            count, width):
+                    if only and name not in only:
+                        continue
+                    # Large inputs are timed once, they take long enough.
+                    seconds = best_of(function, repeat if count < 10 ** 5
+                                      else 1)
+                    results.append({'name': name, 'rows': count,
+                                    'categories': width,
+                                    'seconds': round(seconds, 6)})
+                    print('{:<16} {:>9} rows {:>3} categories {:>10.4f} s'
+                          .format(name, count, width, seconds), flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print the changes from baseline and return the regressions."""
+    previous = {(r['name'], r['rows'], r['categories']): r['seconds']
+                for r in baseline['results']}
+    regressions = []
+    for result in results:
+        key = (result['name'], result['rows'], result['categories'])
+        if key not in previous:
+            print('{:<16} {:>9} {:>3} {:>10} -> {:>10.4f} s  new'
+                  .format(key[0], key[1], key[2], '', result['seconds']))
+            continue
+        before, after = previous[key], result['seconds']
+        change = (after - before) / before if before else 0.0
+        slower = (after > before * (1 + tolerance)
+                  and after - before > MIN_DELTA)
+        print('{:<16} {:>9} {:>3} {:>10.4f} -> {:>10.4f} s {:>+7.1%}{}'
+              .format(key[0], key[1], key[2], before, after, change,
+                      '  REGRESSION' if slower else ''))
+        if slower:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='numbers of rows default:10^2 to 10^4')
+    parser.add_argument('--full', action='store_true',
+                        help='run from 10^2 to 10^7 rows')
+    parser.add_argument('--categories', type=int, nargs='+',
+                        default=CATEGORIES,
+                        help='numbers of categories default:1 4 16')
+    parser.add_argument('--only', nargs='+',
+                        help='names of the benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs per benchmark, the best is kept default:5')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--save', help='write the results as a new baseline')
+    parser.add_argument('--compare', nargs='?', const=BASELINE,
+                        metavar='BASELINE',
+                        help='baseline to compare with '
+                             'default:benchmarks/baseline.json')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown before failing default:0.25')
+    args = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'numpy': tg._numpy() is not None,
+        'results': run(FULL_SIZES if args.full else args.sizes,
+                       args.categories, args.repeat, args.only),
+    }
+    for path in (args.output, args.save):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+                f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ('python', 'machine', 'numpy'):
+            if baseline.get(key) != results[key]:
+                print('Note: the baseline has {} {}, this run {}'.format(
+                    key, baseline.get(key), results[key]))
+        regressions = compare(results['results'], baseline, args.tolerance)
+        if regressions:
+            print('FAIL: {} benchmarks slower than the baseline by more '
+                  'than {:.0%}'.format(len(regressions), args.tolerance))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
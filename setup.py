@@ -18,7 +18,10 @@ with open(path.join(here, 'README.md'), encoding='utf-8') as f:
 setup(
     name='termgraph',
     packages=['termgraph'],
-    entry_points={'console_scripts': ['termgraph=termgraph.termgraph:main']},
+    entry_points={'console_scripts': [
+        'termgraph=termgraph.termgraph:main',
+        'termgraph-server=termgraph.server:main',
+        'termgraph-client=termgraph.server:client']},
     version='0.2.0',
     author="mkaz",
     author_email="marcus@mkaz.com",
@@ -30,6 +33,7 @@ setup(
     keywords='python CLI tool drawing graphs shell terminal',
     python_requires='>=3.6',
     install_requires=['colorama'],
+    extras_require={'fast': ['numpy']},
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Environment :: Console',
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""Render server which keeps termgraph loaded between charts.
+
+termgraph-server listens on a Unix socket. termgraph-client takes the same
+arguments as termgraph and sends them, with its working directory,
+environment and standard streams, to the server. The server forks a
+process already holding the chart code, which runs termgraph there as if
+it had been started by the client: it reads the client's stdin and writes
+to its stdout and stderr directly. The exit status is sent back. Each
+chart then costs a fork instead of starting Python and importing
+termgraph, and clients are served concurrently.
+
+When no server is listening, the client draws the chart itself.
+
+    termgraph-server &
+    termgraph-client data/ex1.dat --width 30
+"""
+
+# This module is imported by the client, so it imports nothing from
+# termgraph at the top.
+import os
+import sys
+
+# Standard streams handed over with each request.
+STREAMS = 3
+
+
+def socket_path():
+    """Return the socket path, $TERMGRAPH_SOCKET or one per user."""
+    path = os.environ.get('TERMGRAPH_SOCKET')
+    if path:
+        return path
+    directory = os.environ.get('XDG_RUNTIME_DIR') or os.environ.get(
+        'TMPDIR', '/tmp')
+    return os.path.join(directory, 'termgraph-{}.sock'.format(os.getuid()))
+
+
+def send_request(sock, argv):
+    """Send argv, the working directory, environment and streams.
+
+       The request is its length, a newline, then the directory, the
+       number of arguments, the arguments and name=value environment
+       variables, separated by NUL characters, which none of them holds."""
+    import socket
+    from array import array
+
+    fields = [os.getcwd(), str(len(argv))] + argv + [
+        '{}={}'.format(name, value) for name, value in os.environ.items()]
+    payload = '\0'.join(fields).encode('utf-8', 'surrogateescape')
+    request = b'%d\n' % len(payload) + payload
+    # The descriptors go along with the first byte.
+    fds = array('i', range(STREAMS))
+    sock.sendmsg([request[:1]],
+                 [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds.tobytes())])
+    sock.sendall(request[1:])
+
+
+def receive_request(sock, rfile):
+    """Return the (cwd, argv, env, fds) sent by send_request."""
+    import socket
+    from array import array
+
+    fds = array('i')
+    first, ancillary, _, _ = sock.recvmsg(
+        1, socket.CMSG_SPACE(STREAMS * fds.itemsize))
+    for level, kind, data in ancillary:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - len(data) % fds.itemsize])
+    length = int(first + rfile.readline())
+    fields = rfile.read(length).decode('utf-8', 'surrogateescape').split(
+        '\0')
+    count = int(fields[1])
+    argv = fields[2:2 + count]
+    env = dict(field.split('=', 1) for field in fields[2 + count:])
+    return fields[0], argv, env, list(fds)
+
+
+def exit_status(code):
+    """Return the exit status of SystemExit(code), as Python sets it."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_request(cwd, argv, env, fds):
+    """Run termgraph for a request in this (forked) process.
+
+       The client's streams replace ours, so termgraph reads and writes
+       them as it would in the client. Returns the exit status."""
+    import traceback
+
+    from termgraph import termgraph
+
+    if len(fds) != STREAMS:
+        for fd in fds:
+            os.close(fd)
+        return 1
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(env)
+    sys.argv = ['termgraph'] + argv
+    try:
+        termgraph.main()
+        status = 0
+    except SystemExit as e:
+        status = exit_status(e.code)
+    except Exception:
+        traceback.print_exc()
+        status = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return status
+
+
+def warm():
+    """Import what charts need, once, before any request is forked."""
+    import gc
+
+    from termgraph import termgraph
+
+    # Draw a chart, so that caches filled on first use (regular
+    # expressions, codecs, ...) are filled before forking.
+    args = termgraph.init_args(['-'])
+    termgraph.render(['a'], [[1.0]], **termgraph.chart_options(args))
+    termgraph._numpy()
+    try:
+        import colorama  # noqa: F401
+    except ImportError:
+        pass
+    import datetime  # noqa: F401
+    import locale  # noqa: F401
+    import traceback  # noqa: F401
+
+    # Objects created so far are never collected, which keeps the pages
+    # holding them shared with the forked processes (Python 3.7+).
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+
+def make_server(path):
+    """Return a server listening on path, a Unix socket only we can use.
+
+       Raises OSError if another server is listening there."""
+    import socket
+    import socketserver
+    import struct
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            status = run_request(*receive_request(self.connection,
+                                                  self.rfile))
+            self.wfile.write(b'%d\n' % status)
+
+    class Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+        block_on_close = False
+
+        def verify_request(self, request, client_address):
+            """Only serve the user who started the server."""
+            if not hasattr(socket, 'SO_PEERCRED'):
+                return True
+            _, uid, _ = struct.unpack('3i', request.getsockopt(
+                socket.SOL_SOCKET, socket.SO_PEERCRED,
+                struct.calcsize('3i')))
+            return uid == os.getuid()
+
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            # Left behind by a server which didn't stop cleanly.
+            os.unlink(path)
+        else:
+            raise OSError('a server is already listening on ' + path)
+        finally:
+            probe.close()
+
+    umask = os.umask(0o077)
+    try:
+        return Server(path, Handler)
+    finally:
+        os.umask(umask)
+
+
+def serve(path=None):
+    """Serve charts on the socket at path until interrupted."""
+    import signal
+
+    if path is None:
+        path = socket_path()
+    warm()
+    server = make_server(path)
+    # Stop cleanly, removing the socket, on kill too.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(path)
+
+
+def client(argv=None):
+    """Draw a chart with the server, or in this process if there's none.
+
+       argv are termgraph's arguments, from sys.argv by default."""
+    import socket
+
+    if argv is None:
+        argv = sys.argv[1:]
+    sock = None
+    if hasattr(socket, 'AF_UNIX'):
+        sock = socket.socket(socket.AF_UNIX)
+        try:
+            sock.connect(socket_path())
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            sock = None
+
+    if sock is None:
+        from termgraph import termgraph
+
+        sys.argv = ['termgraph'] + argv
+        termgraph.main()
+        return
+
+    with sock:
+        send_request(sock, argv)
+        status = sock.makefile('rb').readline()
+    if not status:
+        print('>> Error: the termgraph server closed the connection',
+              file=sys.stderr)
+        sys.exit(1)
+    sys.exit(int(status))
+
+
+def main():
+    """Main function of termgraph-server."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='serve termgraph charts to termgraph-client')
+    parser.add_argument(
+        '--socket',
+        help='socket path, default: $TERMGRAPH_SOCKET or '
+             'termgraph-<uid>.sock in $XDG_RUNTIME_DIR or /tmp')
+    args = parser.parse_args()
+    try:
+        serve(args.socket)
+    except OSError as e:
+        print('>> Error: {}'.format(e), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
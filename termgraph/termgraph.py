@@ -6,17 +6,16 @@
 # https://github.com/mkaz/termgraph
 
 from __future__ import print_function
-import argparse
+import os
 import sys
-from datetime import datetime, timedelta
-from itertools import zip_longest
-from colorama import init
+from io import StringIO
+from array import array
 
+# Modules which are only needed by some features (argparse, datetime,
+# colorama, ...) are imported where they're used, to keep startup fast.
 
 VERSION = '0.2.0'
 
-init()
-
 # ANSI escape SGR Parameters color codes
 AVAILABLE_COLORS = {
     'red': 91,
@@ -33,20 +32,406 @@ DELIM = ','
 TICK = '▇'
 SM_TICK = '▏'
 
+# Ways to combine the rows of a bucket with --max-rows.
+AGGREGATES = ['mean', 'sum', 'min', 'max', 'last', 'lttb']
+INPUT_FORMATS = ['text', 'f64', 'npy', 'struct']
+EVENT_AGGREGATES = ['count', 'sum', 'max']
+
+# Default value of every argument, shared by the command line tool and
+# the render function.
+DEFAULTS = {
+    'filename': '-',
+    'title': None,
+    'width': 50,
+    'format': '{:<5.2f}',
+    'suffix': '',
+    'no_labels': False,
+    'color': None,
+    'no_color': None,
+    'vertical': False,
+    'stacked': False,
+    'different_scale': False,
+    'calendar': False,
+    'start_dt': None,
+    'end_dt': None,
+    'quantiles': False,
+    'custom_tick': '',
+    'delim': '',
+    'input_format': 'text',
+    'columns': 1,
+    'label_file': None,
+    'events': None,
+    'histogram': False,
+    'bins': 20,
+    'bin_width': None,
+    'log_bins': False,
+    'range': None,
+    'top': None,
+    'top_error': 0.0001,
+    'max_rows': None,
+    'aggregate': 'mean',
+    'files': None,
+    'manifest': None,
+    'jobs': None,
+    'follow': False,
+    'interval': 0.1,
+    'dashboard': None,
+    'timings': None,
+    'profile': None,
+    'cache': None,
+    'cache_size': 64,
+    'cache_key': 'stat',
+    'verbose': False,
+    'version': False
+}
+
+# Rendered lines are joined and written in chunks of about this many
+# characters.
+BUFFER_SIZE = 1 << 16
+
 try:
     range = xrange
 except NameError:
     pass
 
-def init_args():
-    """Parse and return the arguments."""
+class _Rows(object):
+    """Row protocol shared by the columnar containers.
+
+       Indexing returns a row as a list of floats and containers compare
+       equal to a list of lists holding the same rows, so they can be used
+       wherever the old list-of-lists data were expected."""
+
+    __hash__ = None
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        try:
+            if len(self) != len(other):
+                return False
+        except TypeError:
+            return NotImplemented
+        return all(row == other[i] for i, row in enumerate(self))
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, list(self))
+
+class ColumnData(_Rows):
+    """Chart data stored column by column.
+
+       Each category is kept in its own array('d') and repeated labels are
+       interned, so a value costs about 8 bytes instead of a boxed float in
+       a list.
+
+       i.e.
+       labels = ['2001', '2002']
+       columns = [array('d', [20.4, 30.7]), array('d', [40.5, 100.0])]"""
+
+    def __init__(self, columns=None, labels=None):
+        self.columns = columns if columns is not None else []
+        self.labels = labels if labels is not None else []
+        self.length = len(self.columns[0]) if self.columns else len(self.labels)
+        # Set when a row doesn't have a value for every category.
+        self.ragged = False
+        # Extrema of each category and sum of each row, kept up to date by
+        # append and extend while the data are read. When columns are
+        # given they're computed on first use instead.
+        self.mins = self.maxs = self.sums = None
+        if not self.length:
+            self.mins, self.maxs, self.sums = [], [], array('d')
+
+    @classmethod
+    def from_rows(cls, rows, labels=None):
+        """Build the columns from a list of lists."""
+        data = cls()
+        for row in rows:
+            data.append(None, row)
+        if labels is not None:
+            data.labels = list(labels)
+        return data
+
+    def append(self, label, values):
+        """Append a row. A None label is not recorded."""
+        if self.length == 0:
+            self.columns = [array('d') for _ in values]
+            self.mins, self.maxs = list(values), list(values)
+            self.sums = array('d')
+
+        if len(values) != len(self.columns):
+            self.ragged = True
+            values = (list(values) + [float('nan')] * len(self.columns))
+            values = values[:len(self.columns)]
+
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        if self.mins is not None:
+            mins, maxs = self.mins, self.maxs
+            for j, value in enumerate(values):
+                if value < mins[j]:
+                    mins[j] = value
+                elif value > maxs[j]:
+                    maxs[j] = value
+        if self.sums is not None:
+            self.sums.append(sum(values))
+        if label is not None:
+            self.labels.append(sys.intern(label))
+        self.length += 1
+
+    def extend(self, other):
+        """Append the rows of another ColumnData.
+
+           Columns of the same width are extended in one go; otherwise the
+           rows are appended one by one, as append would."""
+        if self.length and len(other.columns) != len(self.columns):
+            for i in range(len(other)):
+                self.append(other.labels[i], other[i])
+            return
+
+        if not len(other):
+            return
+        if self.length == 0:
+            self.columns = [array('d') for _ in other.columns]
+            self.mins = list(other.mins or [])
+            self.maxs = list(other.maxs or [])
+        if self.mins is None or other.mins is None:
+            self.mins = self.maxs = None
+        else:
+            self.mins = [b if b < a else a
+                         for a, b in zip(self.mins, other.mins)]
+            self.maxs = [b if b > a else a
+                         for a, b in zip(self.maxs, other.maxs)]
+        if self.sums is None or other.sums is None:
+            self.sums = None
+        else:
+            self.sums.extend(other.sums)
+        for column, values in zip(self.columns, other.columns):
+            column.extend(values)
+        self.labels.extend(other.labels)
+        self.length += len(other)
+        self.ragged = self.ragged or other.ragged
+
+    def _extrema(self):
+        """Compute the statistics append didn't, for given columns."""
+        np = _numpy()
+        if np is not None:
+            arrays = [np.asarray(column) for column in self.columns]
+            self.mins = [float(a.min()) for a in arrays]
+            self.maxs = [float(a.max()) for a in arrays]
+        else:
+            self.mins = [min(column) for column in self.columns]
+            self.maxs = [max(column) for column in self.columns]
+
+    def minimum(self, j):
+        """Return the lowest value of the j-th category."""
+        if not self.length:
+            raise ValueError('minimum of empty data')
+        if self.mins is None:
+            self._extrema()
+        return self.mins[j]
+
+    def maximum(self, j):
+        """Return the highest value of the j-th category."""
+        if not self.length:
+            raise ValueError('maximum of empty data')
+        if self.maxs is None:
+            self._extrema()
+        return self.maxs[j]
+
+    def row_sums(self):
+        """Return the sum of each row, as stacked charts show."""
+        if self.sums is None or len(self.sums) != self.length:
+            self.sums = array('d', map(sum, zip(*self.columns)))
+        return self.sums
+
+    def column(self, j):
+        """Return the values of the j-th category."""
+        return self.columns[j]
+
+    def window(self, start, stop=None):
+        """Return a copy of the rows from start to stop."""
+        columns = [column[start:stop] for column in self.columns]
+        return ColumnData(columns, self.labels[start:stop])
+
+    def select(self, j):
+        """Return the j-th category as a single column dataset.
+
+           The column is shared, not copied."""
+        data = ColumnData([self.columns[j]], self.labels)
+        if self.mins is not None and self.length:
+            data.mins, data.maxs = [self.mins[j]], [self.maxs[j]]
+        return data
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        return [column[i] for column in self.columns]
+
+class ScaledData(_Rows):
+    """Lazy view of a ColumnData with an offset and a scale factor.
+
+       Values are computed on access as (value + offset) * factor, skipping
+       the steps which aren't set, so normalizing never copies the input."""
+
+    def __init__(self, source, offset=None, factor=None):
+        self.source = source
+        self.offset = offset
+        self.factor = factor
+
+    def _scale(self, value):
+        if self.offset is not None:
+            value = value + self.offset
+        if self.factor is not None:
+            value = value * self.factor
+        return value
+
+    def column(self, j):
+        """Return an iterator over the scaled values of the j-th category."""
+        return (self._scale(v) for v in self.source.columns[j])
+
+    def __len__(self):
+        return len(self.source)
+
+    def __getitem__(self, i):
+        return [self._scale(column[i]) for column in self.source.columns]
+
+class _Stage(object):
+    """A pipeline stage being timed, see Timings.stage."""
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.record = {'stage': name, 'seconds': 0.0, 'rows': None,
+                       'cells': None, 'peak_bytes': None}
+
+    def count(self, data):
+        """Record the number of rows and cells of data."""
+        self.record['rows'] = len(data)
+        self.record['cells'] = len(data) * (len(data[0]) if len(data) else 0)
+
+    def __enter__(self):
+        # Before Python 3.9 the peak can't be reset, it's the peak so far.
+        if self.timings.memory and hasattr(self.timings.tracemalloc,
+                                           'reset_peak'):
+            self.timings.tracemalloc.reset_peak()
+        self.start = self.timings.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.record['seconds'] = self.timings.clock() - self.start
+        if self.timings.memory:
+            self.record['peak_bytes'] = \
+                self.timings.tracemalloc.get_traced_memory()[1]
+        self.timings.stages.append(self.record)
+
+class _NoStage(object):
+    """Stage of NO_TIMINGS, which records nothing."""
+
+    def count(self, data):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+class Timings(object):
+    """Wall time, rows, cells and peak traced memory of pipeline stages.
+
+       Pass one to render to collect the validate, normalize, layout,
+       render and write stages; main adds import and read. With memory,
+       tracemalloc runs while the stages are timed, which slows them
+       down."""
+
+    enabled = True
+
+    def __init__(self, memory=True):
+        from time import perf_counter
+
+        self.clock = perf_counter
+        self.memory = memory
+        self.stages = []
+        if memory:
+            import tracemalloc
+
+            self.tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def stage(self, name):
+        """Return a context manager timing the stage called name."""
+        return _Stage(self, name)
+
+    def stop(self):
+        """Stop tracing memory."""
+        if self.memory and self.tracemalloc.is_tracing():
+            self.tracemalloc.stop()
+
+    def report(self, out=None, fmt='text'):
+        """Write the stages to out, stderr by default, as text or json."""
+        if out is None:
+            out = sys.stderr
+        if fmt == 'json':
+            import json
+
+            out.write(json.dumps({'stages': self.stages}) + '\n')
+            return
+        for record in self.stages:
+            line = '>> {:<10} {:>10.2f} ms'.format(record['stage'],
+                                                  record['seconds'] * 1000)
+            if record['rows'] is not None:
+                line += ' {:>10} rows {:>10} cells'.format(record['rows'],
+                                                          record['cells'])
+            if record['peak_bytes'] is not None:
+                line += ' peak {:.1f} KiB'.format(record['peak_bytes'] / 1024)
+            out.write(line + '\n')
+
+class _NoTimings(object):
+    """Timings which record nothing, the default."""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NO_STAGE
+
+_NO_STAGE = _NoStage()
+NO_TIMINGS = _NoTimings()
+
+_NUMPY = False
+
+def _numpy():
+    """Return the numpy module, or None when it isn't installed.
+
+       NumPy is optional. It is only looked up the first time an
+       accelerated path is taken."""
+    global _NUMPY
+    if _NUMPY is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _NUMPY = numpy
+    return _NUMPY
+
+def as_columns(data):
+    """Return data as a ColumnData, converting a list of lists if needed."""
+    if isinstance(data, _Rows):
+        return data
+    return ColumnData.from_rows(data)
+
+def build_parser():
+    """Return the argument parser of the command line tool."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='draw basic graphs on terminal')
     parser.add_argument(
         'filename',
-        nargs='?',
-        default="-",
-        help='data file name (comma or space separated). Defaults to stdin.')
+        nargs='*',
+        help='data file name(s) (comma or space separated). Defaults to '
+             'stdin. Several files are drawn in batch mode.')
     parser.add_argument(
         '--title',
         help='Title of graph'
@@ -54,17 +439,14 @@ def init_args():
     parser.add_argument(
         '--width',
         type=int,
-        default=50,
         help='width of graph in characters default:50'
     )
     parser.add_argument(
         '--format',
-        default='{:<5.2f}',
         help='format specifier to use.'
     )
     parser.add_argument(
         '--suffix',
-        default='',
         help='string to add as a suffix to all data points.'
     )
     parser.add_argument(
@@ -78,6 +460,21 @@ def init_args():
         choices=AVAILABLE_COLORS,
         help='Graph bar color( s )'
     )
+    parser.add_argument(
+        '--no-color',
+        dest='no_color',
+        action='store_const',
+        const=True,
+        help='Write no colors. The default when the output is not a '
+             'terminal or NO_COLOR is set'
+    )
+    parser.add_argument(
+        '--force-color',
+        dest='no_color',
+        action='store_const',
+        const=False,
+        help='Write colors even when the output is not a terminal'
+    )
     parser.add_argument(
         '--vertical',
         action='store_true',
@@ -102,16 +499,158 @@ def init_args():
         '--start-dt',
         help='Start date for Calendar chart'
     )
+    parser.add_argument(
+        '--end-dt',
+        help='End date for Calendar chart, may be years after the start '
+             'date default:a year after the start date'
+    )
+    parser.add_argument(
+        '--quantiles',
+        action='store_true',
+        help='Shade the Calendar chart by quartiles of the values instead '
+             'of fractions of the maximum'
+    )
     parser.add_argument(
         '--custom-tick',
-        default='',
         help='Custom tick mark, emoji approved'
     )
     parser.add_argument(
         '--delim',
-        default='',
         help='Custom delimiter, default , or space'
     )
+    parser.add_argument(
+        '--input-format',
+        choices=INPUT_FORMATS,
+        help='Format of the data file: text, raw little-endian float64 '
+             'columns (f64), NumPy .npy or packed struct records (struct) '
+             'default:text'
+    )
+    parser.add_argument(
+        '--columns',
+        type=int,
+        help='Number of categories in an f64 file default:1'
+    )
+    parser.add_argument(
+        '--labels',
+        dest='label_file',
+        help='Text file with the labels of binary data, one per line. '
+             'Defaults to the row index'
+    )
+    parser.add_argument(
+        '--events',
+        choices=EVENT_AGGREGATES,
+        help='Read raw events, an ISO timestamp per line optionally '
+             'followed by a weight, and chart their count, sum or max '
+             'per day'
+    )
+    parser.add_argument(
+        '--histogram',
+        action='store_true',
+        help='Read raw samples, a number per line, and chart how many '
+             'fall in each bin'
+    )
+    parser.add_argument(
+        '--bins',
+        type=int,
+        help='Number of histogram bins, spread over the samples default:20'
+    )
+    parser.add_argument(
+        '--bin-width',
+        type=float,
+        help='Width of the histogram bins, which start at its multiples, '
+             'instead of a number of bins'
+    )
+    parser.add_argument(
+        '--log-bins',
+        action='store_true',
+        help='Space the histogram bins evenly on a log scale'
+    )
+    parser.add_argument(
+        '--range',
+        type=float,
+        nargs=2,
+        metavar=('LOW', 'HIGH'),
+        help='Range split in histogram bins, other samples are dropped'
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        metavar='K',
+        help='Read raw labels, one per line, and chart the K most frequent '
+             'with approximate counts, in fixed memory'
+    )
+    parser.add_argument(
+        '--top-error',
+        type=float,
+        help='Most the --top counts may be over, as a fraction of the '
+             'lines read. Smaller takes more memory default:0.0001'
+    )
+    parser.add_argument(
+        '--max-rows',
+        type=int,
+        help='Aggregate adjacent rows so at most this many are drawn'
+    )
+    parser.add_argument(
+        '--aggregate',
+        choices=AGGREGATES,
+        help='How rows are combined with --max-rows default:mean'
+    )
+    parser.add_argument(
+        '--manifest',
+        help='File listing data files to draw in batch mode, one per line, '
+             'each followed by its own options'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='Number of worker processes drawing files in batch mode or '
+             'parsing a large file default:CPU count'
+    )
+    parser.add_argument(
+        '--follow',
+        action='store_true',
+        help='Keep reading appended data and redraw the graph live'
+    )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        help='Minimum seconds between redraws in follow and dashboard mode '
+             'default:0.1'
+    )
+    parser.add_argument(
+        '--dashboard',
+        help='File laying out several charts, each redrawn live from its '
+             'own file, FIFO or command, see read_dashboard'
+    )
+    parser.add_argument(
+        '--timings',
+        nargs='?',
+        const='text',
+        choices=['text', 'json'],
+        help='Report the time, size and peak memory of each stage to stderr, '
+             'as text or json'
+    )
+    parser.add_argument(
+        '--profile',
+        help='Write cProfile statistics of the run to this file'
+    )
+    parser.add_argument(
+        '--cache',
+        help='Directory caching the rendered charts. An unchanged file '
+             'drawn with the same options is printed from the cache'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        help='Size limit of the cache in MiB, the least recently used '
+             'charts are removed default:64'
+    )
+    parser.add_argument(
+        '--cache-key',
+        choices=['stat', 'content'],
+        help='Identify files by path, size and modification time (stat) or '
+             'by a hash of their content default:stat'
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -122,45 +661,448 @@ def init_args():
         action='store_true',
         help='Display version and exit'
     )
-    if len(sys.argv) == 1:
+    parser.set_defaults(**DEFAULTS)
+    return parser
+
+def init_args(argv=None):
+    """Parse and return the arguments, from sys.argv by default."""
+    parser = build_parser()
+    if argv is None and len(sys.argv) == 1:
         if sys.stdin.isatty():
             parser.print_usage()
             sys.exit(2)
 
-    args = vars(parser.parse_args())
-
-    if args['custom_tick'] != '':
-        global TICK, SM_TICK
-        TICK = args['custom_tick']
-        SM_TICK = ''
+    return files_args(vars(parser.parse_args(argv)))
 
-    if args['delim'] != '':
-        global DELIM
-        DELIM = args['delim']
+def files_args(args):
+    """Set files to the list of file names given and filename to the first.
+    """
+    files = args['filename']
+    if isinstance(files, str):
+        files = [files]
+    args['files'] = files or ['-']
+    args['filename'] = args['files'][0]
+    return args
 
+def default_args():
+    """Return the arguments the command line tool uses by default."""
+    return dict(DEFAULTS)
+
+def tick_marks(args):
+    """Return the (tick, small tick) pair to draw with."""
+    if args.get('custom_tick'):
+        return args['custom_tick'], ''
+    return TICK, SM_TICK
+
+class DataError(ValueError):
+    """The data can't be drawn, e.g. there are missing values."""
+
+class ParseError(DataError):
+    """A value of the input isn't a number. line is its 1 based number."""
+
+    def __init__(self, line, text):
+        super().__init__('Line {}: invalid number {!r}'.format(line, text))
+        self.line = line
+        self.text = text
+
+    def __reduce__(self):
+        return ParseError, (self.line, self.text)
+
+def render(labels, data, categories=None, out=None, timings=None,
+           **options):
+    """Render a chart and return it as a string, or write it to out.
+
+       labels and data are the label column and the rows of values, as a
+       list of lists or a ColumnData. categories are the names of the
+       columns. options are the same as the long command line flags, with
+       underscores, e.g. render(labels, data, width=30, color=['red']).
+
+       Nothing global is read or changed, so many charts can be rendered
+       in one process. Raises DataError if the data can't be drawn.
+
+       Pass a Timings as timings to measure each stage of the rendering."""
+    if timings is None:
+        timings = NO_TIMINGS
+    args = default_args()
+    unknown = set(options) - set(args)
+    if unknown:
+        raise TypeError('Unknown options: ' + ', '.join(sorted(unknown)))
+    args.update(options)
+
+    labels = [str(label) for label in labels]
+    data = as_columns(data)
+    with timings.stage('validate') as stage:
+        colors = validate_data(labels, data, args)
+        stage.count(data)
+
+    target = StringIO() if out is None else out
+    if args['title']:
+        target.write('# ' + args['title'] + '\n\n')
+    if categories:
+        print_categories(categories, colors, out=target,
+                         tick=tick_marks(args)[0])
+    if args['calendar']:
+        with timings.stage('render'):
+            calendar_heatmap(data, labels, args, out=target)
+    else:
+        chart(colors, data, args, labels, out=target, timings=timings)
+
+    if out is None:
+        return target.getvalue()
+    return None
+
+def init_colors():
+    """Set up the terminal for escape sequences.
+
+       colorama translates them on Windows consoles. It's only loaded when
+       colors or cursor movements are actually going to be written. They
+       are never stripped: no_color decides whether colors are written."""
+    try:
+        from colorama import init
+    except ImportError:
+        return
+    init(strip=False)
+
+def uses_colors(args):
+    """Return True if the chart described by args writes escape sequences."""
+    colors = not args['no_color'] and (args['color'] or args['stacked']
+                                       or args['calendar'])
+    return bool(colors or args['follow'] or args['dashboard'])
+
+def resolve_colors(args, out=None):
+    """Decide whether colors are written to out, stdout by default.
+
+       Unless --no-color or --force-color was given, they're left out when
+       out isn't a terminal (a pipe, a log file) or NO_COLOR is set."""
+    if out is None:
+        out = sys.stdout
+    if args['no_color'] is None:
+        try:
+            terminal = out.isatty()
+        except (AttributeError, ValueError):
+            terminal = False
+        args['no_color'] = not terminal or bool(os.environ.get('NO_COLOR'))
     return args
 
+def chart_options(args):
+    """Return the arguments which render accepts, minus the input ones."""
+    return {key: value for key, value in args.items()
+            if key in DEFAULTS
+            and key not in ('filename', 'delim', 'input_format', 'columns',
+                            'label_file', 'events', 'histogram', 'bins',
+                            'bin_width', 'log_bins', 'range', 'top',
+                            'top_error', 'timings', 'profile', 'cache',
+                            'cache_size', 'cache_key', 'verbose',
+                            'version')}
+
+def cache_key(args):
+    """Return the cache key of the chart described by args.
+
+       It hashes the version, every option changing the output and the
+       identity of the input files: their path, size and modification time,
+       or their content when cache_key is 'content'."""
+    import hashlib
+    import json
+
+    digest = hashlib.sha256(VERSION.encode())
+    options = {key: value for key, value in args.items()
+               if key not in ('filename', 'files', 'manifest', 'jobs',
+                              'timings', 'profile', 'cache', 'cache_size',
+                              'cache_key', 'verbose', 'version')}
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+
+    for path in (args['filename'], args.get('label_file')):
+        if not path:
+            continue
+        if args.get('cache_key') == 'content':
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        else:
+            info = os.stat(path)
+            digest.update('{}\0{}\0{}\0'.format(
+                os.path.abspath(path), info.st_size,
+                info.st_mtime_ns).encode())
+
+    if args['calendar'] and not args['start_dt']:
+        # The default calendar ends today.
+        from datetime import date
+
+        digest.update(date.today().isoformat().encode())
+    return digest.hexdigest()
+
+class OutputCache(object):
+    """On disk cache of rendered charts, keyed by cache_key.
+
+       Entries are written to a temporary file and renamed, so concurrent
+       runs never see a partial chart. Hits refresh the modification time
+       of the entry, and when the cache is over max_bytes the entries used
+       least recently are removed."""
+
+    def __init__(self, directory, max_mib=64):
+        self.directory = directory
+        self.max_bytes = max_mib * (1 << 20)
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def fetch(self, key, out):
+        """Copy the entry of key to out. Return False if there is none."""
+        path = self.path(key)
+        try:
+            with open(path, encoding='utf-8', newline='') as f:
+                os.utime(path)
+                for block in iter(lambda: f.read(BUFFER_SIZE), ''):
+                    out.write(block)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key, text):
+        """Save text as the entry of key, then evict old entries."""
+        import tempfile
+
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.')
+        try:
+            with open(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries over max_bytes."""
+        entries, total = [], 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((info.st_mtime_ns, info.st_size, path))
+                total += info.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+def render_file(args):
+    """Read the file named in args and render its chart.
+
+       Returns (output, error, seconds) where error is None on success.
+       Any failure is caught and returned, so one bad file doesn't stop a
+       batch."""
+    import time
+
+    start = time.perf_counter()
+    try:
+        categories, data = load_data(args)
+        output = '\n' + render(data.labels, data, categories,
+                               **chart_options(args))
+        error = None
+    except Exception as e:
+        output, error = '', str(e) or type(e).__name__
+    return output, error, time.perf_counter() - start
+
+def read_manifest(path, args):
+    """Return the arguments of each file listed in a manifest.
+
+       Each line holds file names followed by their own options, using
+       the command line syntax. Options not given on a line default to
+       args. Blank lines and # comments are skipped.
+
+       i.e.
+       data/ex1.dat --width 20
+       data/ex4.dat --stacked --color red blue"""
+    import shlex
+
+    defaults = dict(args, files=None, manifest=None)
+    jobs = []
+    with open(path) as f:
+        for line in f:
+            tokens = shlex.split(line, comments=True)
+            if not tokens:
+                continue
+            parser = build_parser()
+            parser.set_defaults(**defaults)
+            job = files_args(vars(parser.parse_args(tokens)))
+            for filename in job['files']:
+                jobs.append(dict(job, filename=filename, files=None))
+    return jobs
+
+def batch(jobs, workers=None, out=None, err=None):
+    """Render the files described by jobs in a pool of worker processes.
+
+       Charts are written to out in the order of jobs, each under a
+       ==> filename <== header. Errors and timings go to err. Returns the
+       exit status, 1 if any file failed."""
+    import time
+
+    if out is None:
+        out = sys.stdout
+    if err is None:
+        err = sys.stderr
+
+    start = time.perf_counter()
+    executor = None
+    if workers == 1 or len(jobs) < 2:
+        results = map(render_file, jobs)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(workers)
+        chunksize = max(1, len(jobs) // (workers * 4))
+        # The pool already uses every core, files are parsed serially.
+        results = executor.map(render_file,
+                               [dict(job, jobs=1) for job in jobs],
+                               chunksize=chunksize)
+
+    failed = 0
+    try:
+        for job, (output, error, seconds) in zip(jobs, results):
+            out.write('==> {} <==\n'.format(job['filename']))
+            if error is None:
+                out.write(output)
+            else:
+                failed += 1
+                err.write('>> Error: {}: {}\n'.format(job['filename'], error))
+            err.write('>> {}: {:.1f} ms\n'.format(job['filename'],
+                                                  seconds * 1000))
+            out.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    err.write('>> {} files, {} failed, {:.2f} s wall time\n'.format(
+        len(jobs), failed, time.perf_counter() - start))
+    return 1 if failed else 0
 
 def main():
     """Main function."""
+    if sys.argv[1:] == ['--version']:
+        # Answer without loading the argument parser.
+        print('termgraph v{}'.format(VERSION))
+        sys.exit()
+
     args = init_args()
 
     if args['version']:
         print('termgraph v{}'.format(VERSION))
         sys.exit()
 
-    _, labels, data, colors = read_data(args)
-    if args['calendar']:
-        calendar_heatmap(data, labels, args)
-    else:
-        chart(colors, data, args, labels)
+    resolve_colors(args)
+
+    if args['dashboard']:
+        init_colors()
+        try:
+            dashboard(args)
+        except DataError as e:
+            print('>> Error: {}'.format(e))
+            sys.exit(1)
+        return
+
+    if args['manifest'] or len(args['files']) > 1:
+        if args['follow']:
+            print(">> Error: Follow mode only supports a single file")
+            sys.exit(1)
+        files = args['files']
+        if args['manifest'] and files == ['-']:
+            files = []
+        jobs = [dict(args, filename=filename, files=None) for filename in files]
+        if args['manifest']:
+            jobs += read_manifest(args['manifest'], args)
+        if any(uses_colors(job) for job in jobs):
+            init_colors()
+        sys.exit(batch(jobs, args['jobs']))
+
+    if uses_colors(args):
+        init_colors()
+
+    if args['follow']:
+        if (args['histogram'] or args['events']
+                or args['top'] is not None):
+            print(">> Error: Follow mode reads rows, not raw samples")
+            sys.exit(1)
+        follow(args)
+        return
+
+    if args['verbose']:
+        filename = args['filename']
+        print(f'>> Reading data from {( "stdin" if filename == "-" else filename )}')
+
+    timings = Timings() if args['timings'] else None
+    profiler = None
+    if args['profile']:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    print('')
+    cache = None
+    try:
+        if args['cache'] and os.path.isfile(args['filename']):
+            cache = OutputCache(args['cache'], args['cache_size'])
+            key = cache_key(args)
+            if cache.fetch(key, sys.stdout):
+                return
+
+        if timings is not None:
+            # Import NumPy up front, so that its import isn't charged to
+            # the first stage using it.
+            with timings.stage('import'):
+                _numpy()
+        with (timings or NO_TIMINGS).stage('read') as stage:
+            categories, data = load_data(args)
+            stage.count(data)
+        if cache is None:
+            render(data.labels, data, categories, out=sys.stdout,
+                   timings=timings, **chart_options(args))
+        else:
+            output = render(data.labels, data, categories, timings=timings,
+                            **chart_options(args))
+            sys.stdout.write(output)
+            cache.store(key, output)
+    except DataError as e:
+        print('>> Error: {}'.format(e))
+        sys.exit(1)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args['profile'])
+        if timings is not None:
+            timings.stop()
+            sys.stdout.flush()
+            timings.report(sys.stderr, args['timings'])
 
 def find_min(list_):
     """Return the minimum value in sublist of list."""
+    if isinstance(list_, ColumnData):
+        return list_.minimum(-1)
+    if isinstance(list_, _Rows):
+        return min(list_.column(-1))
     return min([sublist[-1] for sublist in list_])
 
 def find_max(list_):
     """Return the maximum value in sublist of list."""
+    if isinstance(list_, ColumnData):
+        return list_.maximum(-1)
+    if isinstance(list_, _Rows):
+        return max(list_.column(-1))
     return max([sublist[-1] for sublist in list_])
 
 def find_max_label_length(labels):
@@ -172,60 +1114,177 @@ def find_max_label_length(labels):
 
     return length
 
-def normalize(data, width):
-    """Normalize the data and return it."""
-    min_dat = find_min(data)
+def scaling(min_dat, max_dat, width):
+    """Return the (offset, factor) which normalize applies to the data.
+
+       min_dat and max_dat are the extrema of the last category. Either
+       value is None when that step isn't needed."""
     # We offset by the minimum if there's a negative.
-    off_data = []
+    offset = None
     if min_dat < 0:
-        min_dat = abs(min_dat)
-        for dat in data:
-            off_data.append([_d + min_dat for _d in dat])
-    else:
-        off_data = data
-    min_dat = find_min(off_data)
-    max_dat = find_max(off_data)
+        offset = abs(min_dat)
+        # Adding is monotonic, so the maximum moves by the same offset.
+        max_dat = max_dat + offset
 
     if max_dat < width:
         # Don't need to normalize if the max value
         # is less than the width we allow.
-        return off_data
+        return offset, None
 
     # max_dat / width is the value for a single tick. norm_factor is the
     # inverse of this value
     # If you divide a number to the value of single tick, you will find how
     # many ticks it does contain basically.
     norm_factor = width / float(max_dat)
-    normal_dat = []
-    for dat in off_data:
-        normal_dat.append([_v * norm_factor for _v in dat])
 
-    return normal_dat
+    return offset, norm_factor
 
-def horiz_rows(labels, data, normal_dat, args, colors):
-    """Prepare the horizontal graph.
-       Each row is printed through the print_row function."""
-    val_min = find_min(data)
+def normalize(data, width):
+    """Normalize the data and return it.
+
+       The result is a lazy ScaledData view over the columns, the input
+       itself is returned when there is nothing to do."""
+    columns = as_columns(data)
+    offset, factor = scaling(find_min(columns), find_max(columns), width)
+    if offset is None and factor is None:
+        return data
+
+    return ScaledData(columns, offset, factor)
+
+def tick_rows(normal_dat):
+    """Return the normalized data with values truncated to tick counts.
+
+       With NumPy the offset, scale factor and truncation are applied to
+       the whole matrix at once, using the same float64 operations as the
+       pure-Python path. Without it the data are returned as they are and
+       each value is truncated with int() when it's drawn."""
+    np = _numpy()
+    if np is None or not isinstance(normal_dat, _Rows) or not len(normal_dat):
+        return normal_dat
+
+    offset = factor = None
+    source = normal_dat
+    if isinstance(normal_dat, ScaledData):
+        offset, factor = normal_dat.offset, normal_dat.factor
+        source = normal_dat.source
+
+    # column_stack copies, so the arithmetic below can work in place.
+    matrix = np.column_stack([np.asarray(column, dtype=np.float64)
+                              for column in source.columns])
+    if offset is not None:
+        matrix += offset
+    if factor is not None:
+        matrix *= factor
+
+    # Like int(), astype truncates towards zero.
+    return matrix.astype(np.int64)
+
+class Scale(object):
+    """One normalization of the chart data.
+
+       A chart has a single scale, or one per category when the categories
+       have different scales. codes are the color escapes of its
+       categories."""
+
+    def __init__(self, data, normal, codes, val_min=None):
+        self.data = data
+        self.normal = normal
+        self.codes = codes
+        if val_min is None:
+            val_min = find_min(data)
+        self.val_min = val_min
+
+class Layout(object):
+    """Everything about a chart which doesn't change from row to row.
+
+       Built once per chart by plan_layout, so the renderers only do
+       constant work per row."""
+
+    def __init__(self, labels, label_width, fmt, tail, scales, tick,
+                 sm_tick):
+        self.labels = labels
+        self.rows = len(labels)
+        self.label_width = label_width
+        self.fmt = fmt
+        self.tail = tail
+        self.scales = scales
+        self.tick = tick
+        self.sm_tick = sm_tick
+        if label_width is None:
+            self.blank = ''
+        else:
+            self.blank = ' ' * (label_width + 2)
 
-    for i in range(len(labels)):
-        if args['no_labels']:
+    def label(self, i):
+        """Return the padded label of the i-th row."""
+        if self.label_width is None:
             # Hide the labels.
-            label = ''
+            return ''
+        return self.labels[i].ljust(self.label_width) + ': '
+
+def plan_layout(labels, data, args, colors, normal_dat=None, val_min=None,
+                timings=NO_TIMINGS):
+    """Compute the layout of a chart: label column width, value formatter,
+       color escapes and the normalized data of each scale.
+
+       If normal_dat isn't given the data are normalized here, per
+       category when they have different scales. val_min overrides the
+       minimum used for the small tick, when data are only part of the
+       dataset. The normalization and the rest of the layout are timed
+       as separate stages when timings are given."""
+    with timings.stage('layout'):
+        if args['no_labels']:
+            label_width = None
         else:
-            label = "{:<{x}}: ".format(labels[i],
-                                       x=find_max_label_length(labels))
+            label_width = find_max_label_length(labels)
+
+        # Resolve the format and the suffix into a single format call.
+        suffix = args['suffix'].replace('{', '{{').replace('}', '}}')
+        tail = (' ' + args['format'] + suffix).format
+
+    len_categories = len(data[0]) if len(data) else 0
+    if normal_dat is not None:
+        scales = [Scale(data, normal_dat, color_codes(colors, len_categories),
+                        val_min)]
+    elif (args['different_scale'] and not args['stacked']
+          and len_categories > 1):
+        data = as_columns(data)
+        scales = []
+        with timings.stage('normalize') as stage:
+            for i in range(len_categories):
+                cat_data = data.select(i)
+                color = colors[i] if colors else None
+                scales.append(Scale(cat_data,
+                                    normalize(cat_data, args['width']),
+                                    color_codes([color], 1)))
+            stage.count(data)
+    else:
+        with timings.stage('normalize') as stage:
+            scales = [Scale(data, normalize(data, args['width']),
+                            color_codes(colors, len_categories))]
+            stage.count(data)
+
+    tick, sm_tick = tick_marks(args)
+    return Layout(labels, label_width, args['format'].format, tail, scales,
+                  tick, sm_tick)
+
+def horiz_rows(labels, data, normal_dat, args, colors):
+    """Prepare the horizontal graph.
+       Each row is printed through the print_row function."""
+    plan = plan_layout(labels, data, args, colors, normal_dat)
+    scale = plan.scales[0]
+    blocks = tick_rows(scale.normal)
 
+    for i in range(plan.rows):
+        label = plan.label(i)
         values = data[i]
-        num_blocks = normal_dat[i]
+        num_blocks = blocks[i]
 
         for j in range(len(values)):
             # In Multiple series graph 1st category has label at the beginning,
             # whereas the rest categories have only spaces.
             if j > 0:
-                len_label = len(label)
-                label = ' ' * len_label
-            tail = ' {}{}'.format(args['format'].format(values[j]),
-                                  args['suffix'])
+                label = plan.blank
             if colors:
                 color = colors[j]
             else:
@@ -234,10 +1293,51 @@ def horiz_rows(labels, data, normal_dat, args, colors):
             if not args['vertical']:
                 print(label, end="")
 
-            yield(values[j], int(num_blocks[j]), val_min, color)
+            yield(values[j], int(num_blocks[j]), scale.val_min, color)
 
             if not args['vertical']:
-                print(tail)
+                print(plan.tail(values[j]))
+
+def color_codes(colors, count):
+    """Return the (start, end) escape sequences for each category."""
+    codes = []
+    for j in range(count):
+        color = colors[j] if colors else None
+        if color:
+            codes.append((f'\033[{color}m', '\033[0m'))
+        else:
+            codes.append(('', ''))
+    return codes
+
+def sgr_runs(segments):
+    """Return the (start, text) segments joined, start being the escape
+       sequence of the color of text, or '' for none.
+
+       Colors are only written where they change, not around every
+       segment. Spaces keep the current color, they look the same in any.
+       The colors are reset at the end."""
+    parts, current = [], ''
+    for start, text in segments:
+        if start != current and text.strip():
+            parts.append(start or '\033[0m')
+            current = start
+        parts.append(text)
+    if current:
+        parts.append('\033[0m')
+    return ''.join(parts)
+
+def format_bar(value, num_blocks, val_min, tick=None, sm_tick=None):
+    """Return the ticks of a single bar."""
+    if tick is None:
+        tick = TICK
+    if sm_tick is None:
+        sm_tick = SM_TICK
+
+    if num_blocks < 1 and (value > val_min or value > 0):
+        # Print something if it's not the smallest
+        # and the normal value is less than one.
+        return sm_tick
+    return tick * num_blocks
 
 # Prints a row of the horizontal graph.
 def print_row(value, num_blocks, val_min, color):
@@ -248,226 +1348,1518 @@ def print_row(value, num_blocks, val_min, color):
     2: ▇▇▇ 3
     3: ▇▇▇▇ 4
     """
-    if color:
-        sys.stdout.write(f'\033[{color}m') # Start to write colorized.
-
-    if num_blocks < 1 and (value > val_min or value > 0):
-        # Print something if it's not the smallest
-        # and the normal value is less than one.
-        sys.stdout.write(SM_TICK)
-    else:
-        for _ in range(num_blocks):
-            sys.stdout.write(TICK)
-
-    if color:
-        sys.stdout.write('\033[0m') # Back to original.
-
-def stacked_graph(labels, data, normal_data, len_categories, args, colors):
-    """Prepare the horizontal stacked graph.
-       Each row is printed through the print_row function."""
-    val_min = find_min(data)
-
-    for i in range(len(labels)):
-        if args['no_labels']:
-            # Hide the labels.
-            label = ''
-        else:
-            label = "{:<{x}}: ".format(labels[i],
-                                       x=find_max_label_length(labels))
-
-        print(label, end="")
+    bar = format_bar(value, num_blocks, val_min)
+    if bar:
+        start, end = color_codes([color], 1)[0]
+        bar = start + bar + end
+    sys.stdout.write(bar)
+
+def horiz_lines(plan, index=0):
+    """Yield the lines of the horizontal graph, newline included.
+
+       index selects the scale of the plan to draw. Produces the same text
+       as printing horiz_rows through print_row, one string per line
+       instead of one write per tick."""
+    scale = plan.scales[index]
+    data, val_min, codes = scale.data, scale.val_min, scale.codes
+    blocks = tick_rows(scale.normal)
+    label, blank, tail = plan.label, plan.blank, plan.tail
+    tick, sm_tick = plan.tick, plan.sm_tick
+
+    for i in range(plan.rows):
         values = data[i]
-        num_blocks = normal_data[i]
+        num_blocks = blocks[i]
 
         for j in range(len(values)):
-            print_row(values[j], int(num_blocks[j]), val_min, colors[j])
-
-        tail = ' {}{}'.format(args['format'].format(sum(values)),
-                              args['suffix'])
-        print(tail)
-
-value_list, zipped_list, vertical_list, maxi = [], [], [], 0
-
-def vertically(value, num_blocks, val_min, color, args):
-    """Prepare the vertical graph.
-       The whole graph is printed through the print_vertical function."""
-    global maxi, value_list
-
-    value_list.append(str(value))
-
-    # In case the number of blocks at the end of the normalization is less
-    # than the default number, use the maxi variable to escape.
-    if maxi < num_blocks:
-        maxi = num_blocks
-
-    if num_blocks > 0:
-        vertical_list.append((TICK * num_blocks))
-    else:
-        vertical_list.append(SM_TICK)
-
-    # Zip_longest method in order to turn them vertically.
-    for row in zip_longest(*vertical_list, fillvalue='  '):
-        zipped_list.append(row)
-
-    counter, result_list = 0, []
-
-    # Combined with the maxi variable, escapes the appending method at
-    # the correct point or the default one (width).
-    for i in reversed(zipped_list):
-        result_list.append(i)
-        counter += 1
-
-        if maxi == args['width']:
-            if counter == (args['width']):
-                break
-        else:
-            if counter == maxi:
-                break
-
-    # Return a list of rows which will be used to print the result vertically.
-    return result_list
-
-def print_vertical(vertical_rows, labels, color, args):
-    """Print the whole vertical graph."""
-    if color:
-        sys.stdout.write(f'\033[{color}m') # Start to write colorized.
-
-    for row in vertical_rows:
-        print(*row)
-
-    sys.stdout.write('\033[0m') # End of printing colored
+            # In Multiple series graph 1st category has label at the beginning,
+            # whereas the rest categories have only spaces.
+            bar = format_bar(values[j], int(num_blocks[j]), val_min, tick,
+                             sm_tick)
+            if bar:
+                start, end = codes[j]
+                bar = start + bar + end
+            yield ((label(i) if j == 0 else blank) + bar + tail(values[j])
+                   + '\n')
+
+def stacked_lines(plan):
+    """Yield the lines of the horizontal stacked graph, newline included."""
+    scale = plan.scales[0]
+    data, val_min, codes = scale.data, scale.val_min, scale.codes
+    blocks = tick_rows(scale.normal)
+    tick, sm_tick = plan.tick, plan.sm_tick
+    # Totals summed while the data were read.
+    totals = data.row_sums() if isinstance(data, ColumnData) else None
+
+    starts = [start for start, _ in codes]
+
+    for i in range(plan.rows):
+        parts = [plan.label(i)]
+        values = data[i]
+        num_blocks = blocks[i]
 
-    print("-" * len(row) + "Values" + "-" * len(row))
-    # Print Values
-    for value in zip_longest(*value_list, fillvalue=' '):
-        print("  ".join(value))
+        # As sgr_runs, inlined: the color is only switched between bars
+        # of different colors.
+        current = ''
+        for j in range(len(values)):
+            bar = format_bar(values[j], int(num_blocks[j]), val_min, tick,
+                             sm_tick)
+            if bar:
+                if starts[j] != current:
+                    current = starts[j]
+                    bar = (current or '\033[0m') + bar
+                parts.append(bar)
+        if current:
+            parts.append('\033[0m')
+
+        total = totals[i] if totals is not None else sum(values)
+        parts.append(plan.tail(total) + '\n')
+        yield ''.join(parts)
+
+
+def write_lines(lines, out=None, buffer_size=BUFFER_SIZE):
+    """Write the lines to out (stdout by default) in a few large writes."""
+    if out is None:
+        out = sys.stdout
+
+    buf, size = [], 0
+    for line in lines:
+        buf.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            out.write(''.join(buf))
+            buf, size = [], 0
+
+    if buf:
+        out.write(''.join(buf))
 
-    if args['no_labels'] == False:
-        print("-" * len(row) + "Labels" + "-" * len(row))
-        # Print Labels
-        for label in zip_longest(*labels, fillvalue=''):
-            print("  ".join(label))
+def stacked_graph(labels, data, normal_data, len_categories, args, colors):
+    """Prepare the horizontal stacked graph.
+       The rows are rendered by stacked_lines and written in chunks."""
+    plan = plan_layout(labels, data, args, colors, normal_data)
+    write_lines(stacked_lines(plan))
+
+def display_width(text):
+    """Return the number of terminal columns taken by text.
+       Wide characters, such as most emoji, take two."""
+    import unicodedata
+
+    return sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1
+               for ch in text)
+
+def vertical_lines(plan):
+    """Yield the lines of the vertical graph, newline included.
+
+       Each label is a group of columns, one per category, and groups are
+       separated by a space. The columns are transposed once, so drawing
+       takes O(rows x height)."""
+    series = []
+    for scale in plan.scales:
+        blocks = tick_rows(scale.normal)
+        for j, codes in enumerate(scale.codes):
+            values = [row[j] for row in scale.data]
+            heights = [int(row[j]) for row in blocks]
+            series.append((values, heights, codes))
+
+    cell = max(display_width(plan.tick), 1)
+    fill = ' ' * cell
+    height = max([max(heights, default=0) for _, heights, _ in series] + [1])
+    bars = []
+    for _, heights, (start, _) in series:
+        small = (start, plan.sm_tick) if plan.sm_tick else ('', fill)
+        bars.append((heights, (start, plan.tick), small))
+
+    gap = ('', ' ')
+    for level in range(height, 0, -1):
+        cells = []
+        for i in range(plan.rows):
+            if i:
+                cells.append(gap)
+            for heights, bar, small in bars:
+                if heights[i] >= level:
+                    cells.append(bar)
+                elif level == 1 and heights[i] < 1:
+                    cells.append(small)
+                else:
+                    cells.append(('', fill))
+        # Lines end at their last bar.
+        while cells and not cells[-1][1].strip():
+            cells.pop()
+        yield sgr_runs(cells) + '\n'
+
+    columns = plan.rows * len(series)
+    yield '-' * columns + 'Values' + '-' * columns + '\n'
+    texts = [[plan.fmt(v).strip() for v in values]
+             for values, _, _ in series]
+    longest = max([len(t) for column in texts for t in column] + [0])
+    for c in range(longest):
+        groups = []
+        for i in range(plan.rows):
+            groups.append(''.join(column[i][c].ljust(cell)
+                                  if c < len(column[i]) else fill
+                                  for column in texts))
+        yield ' '.join(groups).rstrip() + '\n'
+
+    if plan.label_width is not None:
+        yield '-' * columns + 'Labels' + '-' * columns + '\n'
+        group = cell * len(series)
+        for c in range(plan.label_width):
+            groups = []
+            for label in plan.labels:
+                groups.append((label[c] if c < len(label) else '')
+                              .ljust(group))
+            yield ' '.join(groups).rstrip() + '\n'
+
+def emit(lines, out, timings=NO_TIMINGS):
+    """Write the lines to out. When timed, the lines are all rendered
+       before being written, so the two stages can be told apart."""
+    if not timings.enabled:
+        write_lines(lines, out)
+        return
+    with timings.stage('render'):
+        lines = list(lines)
+    with timings.stage('write'):
+        write_lines(lines, out)
+
+def chart(colors, data, args, labels, out=None, timings=NO_TIMINGS):
+    """Handle the normalization of data and the printing of the graph.
+       It's written to out, stdout by default."""
+    if out is None:
+        out = sys.stdout
 
-def chart(colors, data, args, labels):
-    """Handle the normalization of data and the printing of the graph."""
     len_categories = len(data[0])
     if len_categories > 1:
         # Stacked graph
         if args['stacked']:
-            normal_dat = normalize(data, args['width'])
-            stacked_graph(labels, data, normal_dat, len_categories,
-                          args, colors)
+            plan = plan_layout(labels, data, args, colors, timings=timings)
+            emit(stacked_lines(plan), out, timings)
             return
 
         if not colors:
             colors = [None] * len_categories
 
-        # Multiple series graph with different scales
-        # Normalization per category
-        if args['different_scale']:
-            for i in range(len_categories):
-                cat_data = []
-                for dat in data:
-                    cat_data.append([dat[i]])
-
-                # Normalize data, handle negatives.
-                normal_cat_data = normalize(cat_data, args['width'])
-
-                # Generate data for a row.
-                for row in horiz_rows(labels, cat_data, normal_cat_data,
-                                      args, [colors[i]]):
-                    # Print the row
-                    if not args['vertical']:
-                        print_row(*row)
-                    else:
-                        vertic = vertically(*row, args=args)
-
-                # Vertical graph
-                if args['vertical']:
-                    print_vertical(vertic, labels, colors[i], args)
-
-                print()
-                value_list.clear(), zipped_list.clear(), vertical_list.clear()
-                return
+    # Vertical graph, categories are drawn as groups of columns.
+    if args['vertical'] and not args['stacked']:
+        plan = plan_layout(labels, data, args, colors, timings=timings)
+        emit(vertical_lines(plan), out, timings)
+        out.write('\n')
+        return
+
+    # Multiple series graph with different scales
+    # Normalization per category
+    if len_categories > 1 and args['different_scale']:
+        plan = plan_layout(labels, data, args, colors, timings=timings)
+        emit(horiz_lines(plan, 0), out, timings)
+        out.write('\n')
+        return
 
     # One category/Multiple series graph with same scale
     # All-together normalization
     if not args['stacked']:
-        normal_dat = normalize(data, args['width'])
-        for row in horiz_rows(labels, data, normal_dat, args, colors):
-            if not args['vertical']:
-                print_row(*row)
-            else:
-                vertic = vertically(*row, args=args)
-
-        if args['vertical'] and len_categories == 1:
-            if colors:
-                color = colors[0]
-            else:
-                color = None
-
-            print_vertical(vertic, labels, color, args)
+        plan = plan_layout(labels, data, args, colors, timings=timings)
+        emit(horiz_lines(plan), out, timings)
+        out.write('\n')
 
-        print()
+def validate_data(labels, data, args):
+    """Check that all data were inserted correctly. Return the colors,
+       none with no_color.
 
-def check_data(labels, data, args):
-    """Check that all data were inserted correctly. Return the colors."""
+       Raises DataError when they weren't."""
     len_categories = len(data[0])
 
     # Check that there are data for all labels.
     if len(labels) != len(data):
-        print(">> Error: Label and data array sizes don't match")
-        sys.exit(1)
+        raise DataError("Label and data array sizes don't match")
 
     # Check that there are data for all categories per label.
-    for dat in data:
-        if len(dat) != len_categories:
-            print(">> Error: There are missing values")
-            sys.exit(1)
+    if isinstance(data, ColumnData):
+        missing = data.ragged
+    else:
+        missing = any(len(dat) != len_categories for dat in data)
+    if missing:
+        raise DataError("There are missing values")
 
     colors = []
 
     # If user inserts colors, they should be as many as the categories.
     if args['color'] is not None:
         if len(args['color']) != len_categories:
-            print(">> Error: Color and category array sizes don't match")
-            sys.exit(1)
+            raise DataError("Color and category array sizes don't match")
 
         for color in args['color']:
             colors.append(AVAILABLE_COLORS.get(color))
 
-    # Vertical graph for multiple series of same scale is not supported yet.
-    if args['vertical'] and len_categories > 1 and not args['different_scale']:
-        print(">> Error: Vertical graph for multiple series of same "
-              "scale is not supported yet.")
-        sys.exit(1)
-
     # If user hasn't inserted colors, pick the first n colors
     # from the dict (n = number of categories).
     if args['stacked'] and not colors:
         colors = [v for v in list(AVAILABLE_COLORS.values())[:len_categories]]
 
+    if args.get('no_color'):
+        return []
     return colors
 
-def print_categories(categories, colors):
+def check_data(labels, data, args):
+    """Check that all data were inserted correctly. Return the colors.
+
+       Prints the error and exits when they weren't."""
+    try:
+        return validate_data(labels, data, args)
+    except DataError as e:
+        print(">> Error: {}".format(e))
+        sys.exit(1)
+
+def print_categories(categories, colors, out=None, tick=TICK):
     """Print a tick and the category's name for each category above
        the graph."""
-    for i in range(len(categories)):
-        if colors:
-            sys.stdout.write(f'\033[{colors[i]}m') # Start to write colorized.
+    if out is None:
+        out = sys.stdout
+
+    out.write(sgr_runs((f'\033[{colors[i]}m' if colors else '',
+                        tick + ' ' + categories[i] + '  ')
+                       for i in range(len(categories))))
+    out.write('\n\n\n')
+
+def iter_data(lines, delim=None):
+    """Parse lines of data lazily and yield them as events.
+
+       Category lines yield ('categories', names) and data lines yield
+       ('row', (label, values)). Blank lines and comments are skipped.
+
+       i.e.
+       ('categories', ['boys', 'girls'])
+       ('row', ('2001', [20.4, 40.5]))"""
+    if delim is None:
+        delim = DELIM
+
+    for line in lines:
+        line = line.strip()
+        if line:
+            if not line.startswith('#'):
+                if line.find(delim) > 0:
+                    cols = line.split(delim)
+                else:
+                    cols = line.split()
+
+                # Line contains categories.
+                if line.startswith('@'):
+                    cols[0] = cols[0].replace("@ ", "")
+                    yield 'categories', cols
+
+                # Line contains label and values.
+                else:
+                    data_points = []
+                    for i in range(1, len(cols)):
+                        data_points.append(float(cols[i].strip()))
+
+                    yield 'row', (cols[0].strip(), data_points)
+
+# Lines parsed together by iter_blocks.
+BLOCK_ROWS = 4096
+
+def block_labels(labels):
+    """Return the stripped labels of a block of rows.
+
+       Only labels repeated in the block are interned: interning them all
+       would take longer than parsing the values."""
+    labels = list(map(str.strip, labels))
+    if len(set(labels)) < len(labels):
+        labels = list(map(sys.intern, labels))
+    return labels
+
+def rows_block(labels, columns, numbers):
+    """Return rows of the same width as a ColumnData with its extrema.
+
+       columns are the value strings of each category and numbers the line
+       number of each row. Each column is converted by a single map(float),
+       the extrema by min and max over the arrays. If one fails, the rows
+       are read again in line order, to report the first invalid number
+       as iter_data does."""
+    values = []
+    for column in columns:
+        try:
+            values.append(array('d', map(float, column)))
+        except ValueError:
+            for number, texts in zip(numbers, zip(*columns)):
+                for text in texts:
+                    try:
+                        float(text)
+                    except ValueError:
+                        raise ParseError(number, text.strip()) from None
+            raise
+    data = ColumnData(values, block_labels(labels))
+    data.mins = [min(column) for column in values]
+    data.maxs = [max(column) for column in values]
+    # Row sums are only needed by stacked charts, see row_sums.
+    data.sums = None
+    return data
+
+def loaded_block(labels, lines, delim, width):
+    """Return rows read by numpy.loadtxt as a ColumnData, or None.
+
+       lines are split on delim (None for spaces) into width columns, the
+       first of which are the labels. None is returned if a value isn't
+       read, e.g. it isn't a number."""
+    import warnings
+
+    np = _numpy()
+    with warnings.catch_warnings():
+        # Blank values are skipped with a warning, see the length below.
+        warnings.simplefilter('ignore')
+        try:
+            rows = np.loadtxt(lines, delimiter=delim, comments=None,
+                              usecols=range(1, width), ndmin=2)
+        except ValueError:
+            return None
+    if len(rows) != len(lines):
+        return None
+    matrix = rows.T
+    data = ColumnData([array('d', column.tobytes()) for column in matrix],
+                      block_labels(labels))
+    if np.isnan(matrix).any():
+        # min and max don't order NaN the way NumPy does.
+        data.mins = [min(column) for column in data.columns]
+        data.maxs = [max(column) for column in data.columns]
+    else:
+        data.mins = matrix.min(axis=1).tolist()
+        data.maxs = matrix.max(axis=1).tolist()
+    data.sums = None
+    return data
+
+def block_rows(lines, delim, by_delim, numbers):
+    """Return stripped lines as a ColumnData if they are rows of one width.
+
+       Returns None when a line is blank, a comment, categories, has no
+       values or is split differently, so that iter_blocks reads the
+       lines in runs. With NumPy the values are read by one loadtxt
+       call, else (or if it can't read one) a column at a time by
+       rows_block, which reports the line of an invalid number.
+
+       No object is kept per line but the labels: that many live
+       containers would make the garbage collector run over and over."""
+    from itertools import repeat
+    from operator import contains, itemgetter
+
+    if '' in lines or {'#', '@'} & set(map(itemgetter(0), lines)):
+        return None
+    if by_delim:
+        counts = set(map(str.count, lines, repeat(delim)))
+        if len(counts) != 1 or 0 in counts:
+            return None
+        width = counts.pop() + 1
+        labels = list(map(itemgetter(0), map(str.split, lines, repeat(delim),
+                                             repeat(1))))
+        if '' in labels:
+            return None
+        # loadtxt only splits on one character, and on any run of spaces.
+        fast = len(delim) == 1 and not delim.isspace()
+    else:
+        if any(map(contains, lines, repeat(delim))):
+            return None
+        widths = set(map(len, map(str.split, lines)))
+        width = widths.pop()
+        if widths or width < 2:
+            return None
+        labels = list(map(itemgetter(0),
+                          map(str.split, lines, repeat(None), repeat(1))))
+        delim = None
+        fast = True
+
+    if fast and _numpy() is not None:
+        data = loaded_block(labels, lines, delim, width)
+        if data is not None:
+            return data
+    cells = (delim or ' ').join(lines).split(delim)
+    return rows_block(labels, [cells[j::width] for j in range(1, width)],
+                      numbers)
+
+def row_runs(lines, delim, by_delim):
+    """Return the (start, stop) ranges of lines with as many fields.
+
+       Fields are counted the way rows were sniffed to be split, so that
+       most runs are rows block_rows reads together. Blank lines,
+       comments and categories usually have another count and fall in
+       runs of their own."""
+    from itertools import compress, count, islice, repeat
+    from operator import ne
+
+    if by_delim:
+        keys = list(map(str.count, lines, repeat(delim)))
+    else:
+        keys = list(map(len, map(str.split, lines)))
+    cuts = [0]
+    cuts.extend(compress(count(1), map(ne, keys, islice(keys, 1, None))))
+    cuts.append(len(lines))
+    return list(zip(cuts, cuts[1:]))
+
+def line_events(lines, delim, first):
+    """Yield the events of stripped lines read one by one, as iter_data
+       does, with consecutive rows of the same width in ('rows',
+       ColumnData) events. first is the number of the first line."""
+    labels, cells, numbers = [], [], []
+    for number, line in enumerate(lines, first):
+        if not line or line[0] == '#':
+            continue
+        if line[0] == '@':
+            if labels:
+                yield 'rows', rows_block(labels, list(zip(*cells)), numbers)
+                labels, cells, numbers = [], [], []
+            yield from iter_data([line], delim)
+            continue
+
+        cols = line.split(delim) if line.find(delim) > 0 else line.split()
+        if labels and len(cols) - 1 != len(cells[0]):
+            yield 'rows', rows_block(labels, list(zip(*cells)), numbers)
+            labels, cells, numbers = [], [], []
+        labels.append(cols[0])
+        cells.append(cols[1:])
+        numbers.append(number)
+    if labels:
+        yield 'rows', rows_block(labels, list(zip(*cells)), numbers)
+
+def iter_blocks(lines, delim=None, first=1, size=BLOCK_ROWS):
+    """Parse lines of data in blocks, yielding them as events.
+
+       Like iter_data, but consecutive rows of the same width are yielded
+       in ('rows', ColumnData) events, converted a column at a time.
+       Whether rows are split on delim or on spaces is sniffed from the
+       first one. Blocks of size lines which are all rows split that way
+       are converted at once, other blocks in runs found by row_runs.
+       Every line is read as iter_data would. Invalid numbers raise
+       ParseError with their line number, counted from first."""
+    from itertools import islice
+
+    if delim is None:
+        delim = DELIM
+
+    lines = iter(lines)
+    by_delim = None
+    while True:
+        block = list(map(str.strip, islice(lines, size)))
+        if not block:
+            return
+        if by_delim is None:
+            for line in block:
+                if line and line[0] not in '#@':
+                    by_delim = line.find(delim) > 0
+                    break
+
+        data = block_rows(block, delim, by_delim,
+                          range(first, first + len(block)))
+        if data is not None:
+            yield 'rows', data
+            first += len(block)
+            continue
+
+        for start, stop in row_runs(block, delim, by_delim):
+            run = block[start:stop]
+            data = block_rows(run, delim, by_delim,
+                              range(first + start, first + stop))
+            if data is not None:
+                yield 'rows', data
+            else:
+                yield from line_events(run, delim, first + start)
+        first += len(block)
 
-        sys.stdout.write(TICK + ' ' + categories[i] + '  ')
-        if colors:
-            sys.stdout.write('\033[0m') # Back to original.
+def stream_data(args, parse=iter_data):
+    """Open the file (or stdin) named in args and yield its events.
 
-    print('\n\n')
+       See iter_data (or parse) for the events yielded. Nothing is
+       printed, so the caller decides when to draw the title and
+       categories."""
+    filename = args['filename']
+    stdin = filename == '-'
+
+    f = sys.stdin if stdin else open(filename, "r")
+    try:
+        yield from parse(f, args.get('delim') or None)
+    finally:
+        if not stdin:
+            f.close()
+
+# Files smaller than this are parsed on one core.
+PARALLEL_MIN_SIZE = 1 << 23
+
+def parse_jobs(args):
+    """Return how many processes should parse the file named in args.
+
+       Only large regular files are split, stdin and pipes are read
+       serially."""
+    filename = args['filename']
+    jobs = args.get('jobs') or os.cpu_count() or 1
+    if jobs < 2 or filename == '-' or not os.path.isfile(filename):
+        return 1
+    if os.path.getsize(filename) < PARALLEL_MIN_SIZE:
+        return 1
+    return jobs
+
+def chunk_offsets(filename, count):
+    """Split a file in about count byte ranges which end after a newline."""
+    import mmap
+
+    with open(filename, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        offsets = [0]
+        for i in range(1, count):
+            end = mm.find(b'\n', max(size * i // count, offsets[-1]))
+            if end < 0:
+                break
+            if end + 1 > offsets[-1]:
+                offsets.append(end + 1)
+        if offsets[-1] < size:
+            offsets.append(size)
+    return list(zip(offsets, offsets[1:]))
+
+def parse_chunk(job):
+    """Parse the lines of a byte range of a file.
+
+       Returns the events of iter_blocks, whose ('rows', ColumnData)
+       events are much cheaper to send back from a worker process than
+       one tuple per row."""
+    import locale
+    import mmap
+
+    filename, start, stop, delim = job
+    with open(filename, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Decoded like open(filename, "r") would.
+        text = mm[start:stop].decode(locale.getpreferredencoding(False))
+        try:
+            return list(iter_blocks(text.split('\n'), delim))
+        except ParseError as e:
+            # Number the line from the start of the file.
+            raise ParseError(e.line + mm[:start].count(b'\n'),
+                             e.text) from None
+
+def parallel_data(args, jobs):
+    """Yield the events of the file named in args, parsed by jobs processes.
+
+       The file is memory mapped and split in newline aligned chunks, each
+       parsed by iter_blocks in a worker. Events come back in file order."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    filename = args['filename']
+    delim = args.get('delim') or None
+    chunks = [(filename, start, stop, delim)
+              for start, stop in chunk_offsets(filename, jobs * 4)]
+    with ProcessPoolExecutor(jobs) as executor:
+        for events in executor.map(parse_chunk, chunks):
+            yield from events
+
+# Array typecodes of the struct and .npy field types binary columns can
+# hold, keyed by struct format character.
+BINARY_TYPES = {'d': 'd', 'f': 'f', 'b': 'b', 'B': 'B', 'h': 'h', 'H': 'H',
+                'i': 'i', 'I': 'I', 'q': 'q', 'Q': 'Q'}
+
+def gather(buffer, offset, size, count, stride):
+    """Return the size bytes found every stride bytes from offset, packed.
+
+       A contiguous field is a view of buffer, anything else is copied
+       with one strided slice per byte of the field."""
+    stop = offset + stride * count
+    if size == stride:
+        return memoryview(buffer)[offset:stop]
+    packed = bytearray(size * count)
+    for byte in range(size):
+        packed[byte::size] = buffer[offset + byte:stop:stride]
+    return memoryview(packed)
+
+def binary_column(buffer, offset, count, stride, code='d', byteorder='<'):
+    """Return count numbers of one field of packed records.
+
+       The field starts offset bytes into buffer and repeats every stride
+       bytes. Contiguous native float64 is a memoryview of buffer, without
+       any copy; other fields are gathered and converted in C. No Python
+       object is made per value in either case."""
+    if code not in BINARY_TYPES:
+        raise DataError('Unsupported field type: {}'.format(code))
+    packed = gather(buffer, offset, array(BINARY_TYPES[code]).itemsize,
+                    count, stride)
+
+    if sys.byteorder == 'little':
+        swap = byteorder in '>!'
+    else:
+        swap = byteorder == '<'
+    if code == 'd' and not swap:
+        return packed.cast('d')
+    values = array(BINARY_TYPES[code])
+    values.frombytes(packed)
+    if swap:
+        values.byteswap()
+    return values if code == 'd' else array('d', values)
+
+def map_file(filename):
+    """Return the content of a file as a read only buffer.
+
+       Regular files are memory mapped, stdin is read."""
+    import mmap
+
+    if filename == '-':
+        return sys.stdin.buffer.read()
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        # The map outlives the file, and the columns viewing it.
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def f64_columns(buffer, width):
+    """Return the columns of raw little-endian float64 data.
+
+       The file holds width columns one after the other, each with the
+       same number of values."""
+    if width < 1 or len(buffer) % (8 * width):
+        raise DataError('File size is not a multiple of {} float64 columns'
+                        .format(width))
+    count = len(buffer) // (8 * width)
+    return [binary_column(buffer, 8 * count * j, count, 8)
+            for j in range(width)], None
+
+def npy_columns(buffer):
+    """Return the columns of a NumPy .npy file of one or two dimensions.
+
+       NumPy itself isn't needed, the header is parsed here."""
+    import ast
+
+    if bytes(buffer[:6]) != b'\x93NUMPY':
+        raise DataError('Not a .npy file')
+    size = 2 if buffer[6] == 1 else 4
+    start = 8 + size + int.from_bytes(buffer[8:8 + size], 'little')
+    header = ast.literal_eval(bytes(buffer[8 + size:start]).decode('latin1'))
+
+    descr, shape = header['descr'], header['shape']
+    byteorder, kind, itemsize = descr[0], descr[1], int(descr[2:])
+    code = {('f', 8): 'd', ('f', 4): 'f', ('i', 1): 'b', ('u', 1): 'B',
+            ('i', 2): 'h', ('u', 2): 'H', ('i', 4): 'i', ('u', 4): 'I',
+            ('i', 8): 'q', ('u', 8): 'Q'}.get((kind, itemsize))
+    if code is None or len(shape) not in (1, 2):
+        raise DataError('Unsupported .npy array: {} {}'.format(descr, shape))
+
+    count, width = shape[0], shape[1] if len(shape) == 2 else 1
+    if header['fortran_order'] or width == 1:
+        fields = [(start + itemsize * count * j, itemsize) for j in range(width)]
+    else:
+        fields = [(start + itemsize * j, itemsize * width)
+                  for j in range(width)]
+    return [binary_column(buffer, offset, count, stride, code, byteorder)
+            for offset, stride in fields], None
+
+def struct_columns(buffer):
+    """Return the columns and labels of packed struct records.
+
+       The file starts with a header line holding TGS1 and the struct
+       format of a record, followed by the packed records. The first
+       string field, if any, holds the labels and every other field is a
+       category.
+
+       i.e.
+       TGS1 <8sdd
+       followed by records of an 8 bytes label and two float64"""
+    import re
+    import struct
+
+    end = buffer.find(b'\n')
+    header = bytes(buffer[:end]).decode('ascii').split() if end > 0 else []
+    if len(header) != 2 or header[0] != 'TGS1':
+        raise DataError('Missing TGS1 header line')
+    fmt = header[1]
+    byteorder = fmt[0] if fmt[0] in '@=<>!' else '@'
+    try:
+        stride = struct.calcsize(fmt)
+    except struct.error as e:
+        raise DataError('Bad struct format {}: {}'.format(fmt, e))
+    start = end + 1
+    count = (len(buffer) - start) // stride
+
+    columns, labels = [], None
+    prefix = byteorder
+    for repeat, code in re.findall(r'(\d*)(\w|\?)', fmt):
+        repeat = int(repeat or 1)
+        if code in 'sx':
+            if code == 's' and labels is None:
+                packed = gather(buffer, start + struct.calcsize(prefix),
+                                repeat, count, stride)
+                labels = [bytes(packed[i:i + repeat]).rstrip(b'\0').decode()
+                          for i in range(0, repeat * count, repeat)]
+            prefix += '{}{}'.format(repeat, code)
+            continue
+
+        for _ in range(repeat):
+            # Offset of the field, after any alignment padding.
+            offset = (struct.calcsize(prefix + code)
+                      - struct.calcsize(byteorder + code))
+            columns.append(binary_column(buffer, start + offset, count,
+                                         stride, code, byteorder))
+            prefix += code
+    return columns, labels
+
+def read_labels(filename, delim=None):
+    """Return the (categories, labels) of a --labels text file.
+
+       Each stripped line is a label, which may hold spaces or the
+       delimiter. Blank lines and comments are skipped, and a line
+       starting with @ holds the categories, split on delim or else on
+       spaces."""
+    if delim is None:
+        delim = DELIM
+
+    categories, labels = [], []
+    try:
+        with open(filename) as f:
+            for line in map(str.strip, f):
+                if not line or line[0] == '#':
+                    continue
+                if line[0] == '@':
+                    names = line[1:].strip()
+                    categories = (list(map(str.strip, names.split(delim)))
+                                  if delim in names else names.split())
+                else:
+                    labels.append(line)
+    except UnicodeDecodeError as e:
+        raise DataError('{} is not a text file: {}'.format(filename, e))
+    return categories, labels
+
+def load_binary(args):
+    """Read the binary data file named in args.
+
+       Returns (categories, data) like load_data. Labels and categories
+       come from the --labels text file, see read_labels, else from the
+       records or the row index."""
+    buffer = map_file(args['filename'])
+    input_format = args['input_format']
+    if input_format == 'f64':
+        columns, labels = f64_columns(buffer, args.get('columns') or 1)
+    elif input_format == 'npy':
+        columns, labels = npy_columns(buffer)
+    else:
+        columns, labels = struct_columns(buffer)
+
+    count = len(columns[0]) if columns else 0
+    categories = []
+    if args.get('label_file'):
+        categories, labels = read_labels(args['label_file'],
+                                         args.get('delim') or None)
+        if len(labels) != count:
+            raise DataError('{} has {} labels for {} rows'.format(
+                args['label_file'], len(labels), count))
+    elif labels is None:
+        labels = [str(i) for i in range(count)]
+
+    return categories, ColumnData(columns, labels)
+
+# Events and labels files are parsed in chunks of at most this many bytes.
+EVENTS_CHUNK_SIZE = 1 << 26
+
+# Event lines counted at a time by day_events.
+EVENTS_BATCH_LINES = 1 << 16
+
+def day_events(lines, how='count', delim=None):
+    """Aggregate lines of timestamped events into a value per day.
+
+       Each line holds an ISO 8601 timestamp, optionally followed by a
+       weight (1 by default), the last field of the line. Only the
+       yyyy-mm-dd prefix is looked at, so nothing is parsed per line when
+       counting and memory is bounded by the number of distinct days.
+       Lines are bytes, the keys are the prefixes. Lines which don't
+       start with a date, e.g. headers or comments, are skipped: a prefix
+       is checked the first time it's seen, when counting once per batch
+       of EVENTS_BATCH_LINES lines. Raises ParseError on a weight which
+       isn't a number."""
+    from collections import Counter
+    from itertools import islice
+    from operator import itemgetter
+
+    if how == 'count':
+        days = Counter()
+        lines = iter(lines)
+        while True:
+            batch = Counter(map(itemgetter(slice(0, 10)),
+                                islice(lines, EVENTS_BATCH_LINES)))
+            if not batch:
+                return days
+            for day in list(batch):
+                if day not in days and not is_day(day):
+                    del batch[day]
+            days.update(batch)
+
+    delim = (delim or DELIM).encode()
+    days = {}
+    for number, line in enumerate(lines, 1):
+        day = line[:10]
+        if day not in days and not is_day(day):
+            continue
+        _, sep, weight = line.rpartition(delim)
+        if not sep:
+            fields = line.split()
+            weight = fields[-1] if len(fields) > 1 else b'1'
+        if b':' in weight:
+            # The time of "yyyy-mm-dd hh:mm:ss", there's no weight.
+            weight = b'1'
+        try:
+            weight = float(weight)
+        except ValueError:
+            raise ParseError(number, weight.strip().decode(
+                errors='replace')) from None
+        if day not in days:
+            days[day] = weight
+        elif how == 'sum':
+            days[day] += weight
+        elif weight > days[day]:
+            days[day] = weight
+    return days
+
+def is_day(prefix):
+    """Return whether the bytes prefix of an event line is a date."""
+    try:
+        iso_day(prefix.decode())
+    except ValueError:
+        return False
+    return True
+
+def merge_days(days, other, how='count'):
+    """Merge the per day values of other into days."""
+    for day, value in other.items():
+        if day not in days:
+            days[day] = value
+        elif how != 'max':
+            days[day] += value
+        elif value > days[day]:
+            days[day] = value
+    return days
+
+def events_chunk(job):
+    """Aggregate the events in a byte range of a file, see day_events."""
+    import mmap
+
+    filename, start, stop, how, delim = job
+    with open(filename, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = mm[start:stop].split(b'\n')
+        try:
+            return dict(day_events(lines, how, delim))
+        except ParseError as e:
+            # Number the line from the start of the file.
+            raise ParseError(e.line + mm[:start].count(b'\n'),
+                             e.text) from None
+
+def event_rows(days):
+    """Return the per day values as (categories, data), sorted by date."""
+    rows = []
+    for day, value in days.items():
+        try:
+            rows.append((iso_day(day.decode()), value))
+        except (UnicodeDecodeError, ValueError):
+            continue
+    rows.sort()
+    return [], ColumnData([array('d', [value for _, value in rows])],
+                          [day.isoformat() for day, _ in rows])
+
+def load_events(args):
+    """Read the raw events named in args into one row per day.
+
+       Large files are split in chunks aggregated by parallel workers."""
+    filename, how = args['filename'], args['events']
+    delim = args.get('delim') or None
+    jobs = parse_jobs(args)
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        count = max(jobs * 4, os.path.getsize(filename) // EVENTS_CHUNK_SIZE)
+        chunks = [(filename, start, stop, how, delim)
+                  for start, stop in chunk_offsets(filename, count)]
+        days = {}
+        with ProcessPoolExecutor(jobs) as executor:
+            for part in executor.map(events_chunk, chunks):
+                merge_days(days, part, how)
+    elif filename == '-':
+        days = day_events(sys.stdin.buffer, how, delim)
+    else:
+        with open(filename, 'rb') as f:
+            days = day_events(f, how, delim)
+    return event_rows(days)
+
+def sample_blocks(lines, delim=None, size=BLOCK_ROWS):
+    """Yield the raw samples of lines, a number per line, in lists.
+
+       The number is the last field of a line, so labelled rows can be
+       read too. Blank lines, comments and categories are skipped. Raises
+       ParseError on a field which isn't a number."""
+    from itertools import islice
+
+    lines = iter(lines)
+    first = 1
+    while True:
+        block = list(islice(lines, size))
+        if not block:
+            return
+        try:
+            # Bare numbers, float() ignores the whitespace around them.
+            yield list(map(float, block))
+        except ValueError:
+            samples = []
+            for number, line in enumerate(block, first):
+                line = line.strip()
+                if not line or line[0] in '#@':
+                    continue
+                fields = line.rpartition(delim or DELIM)[2].split() or ['']
+                try:
+                    samples.append(float(fields[-1]))
+                except ValueError:
+                    raise ParseError(number, fields[-1]) from None
+            yield samples
+        first += len(block)
+
+# Bins spread over the range of the samples are counted this many times
+# finer, then merged, so the range growing only costs a little precision.
+HISTOGRAM_RESOLUTION = 16
+
+class Histogram(object):
+    """Count a stream of samples in bins, in O(bins) memory.
+
+       With low and high fixed, the range is split in bins of equal width
+       and samples outside of it are dropped. With width, the bins are the
+       multiples of width the samples fall in. Otherwise the range is
+       taken from the first samples (or low and high found beforehand),
+       and a sample falling outside of it doubles the width of the bins,
+       merging neighbours in pairs, until it fits (like RowBuckets). Those
+       bins are counted HISTOGRAM_RESOLUTION times finer, then merged into
+       at most bins spanning the samples.
+
+       With log, the bins are spaced evenly on a log scale: everything
+       above applies to the base 10 logarithm of the samples, and samples
+       which aren't positive are dropped. So are NaN and infinities."""
+
+    def __init__(self, bins, low=None, high=None, width=None, log=False,
+                 fixed=False):
+        from collections import Counter
+        from math import log10
+
+        self.bins = max(bins, 1)
+        self.log = log
+        self.width = width
+        self.fixed = fixed
+        self.dropped = 0
+        self.low = self.high = self.counts = None
+        # Extrema of the samples, when the range isn't fixed.
+        self.smallest = self.largest = None
+        self.size = self.bins * (1 if fixed else HISTOGRAM_RESOLUTION)
+        # The first samples, while the range isn't known.
+        self.pending = None
+        if low is not None and log:
+            if low <= 0:
+                raise DataError('The range of log bins must be positive')
+            low, high = log10(low), log10(high)
+        if width:
+            self.low, self.high = low, high
+            self.counts = Counter()
+        elif low is not None:
+            self._start(low, high)
+        else:
+            self.pending = []
+
+    def _start(self, low, high):
+        """Split low to high in bins. The last one includes high."""
+        if high <= low:
+            # A single value.
+            high = low + (abs(low) or 1.0)
+        self.low, self.high = low, high
+        self.counts = [0] * self.size
+
+    def _grow(self, left):
+        """Double the width of the bins, extending the range to the left
+           or to the right."""
+        size, counts = self.size, self.counts
+        span = self.high - self.low
+        if left:
+            self.low -= span
+        else:
+            self.high += span
+        offset = size if left else 0
+        merged = [0] * size
+        for i in range(size):
+            merged[(offset + i) // 2] += counts[i]
+        self.counts = merged
+
+    def add(self, samples):
+        """Count a list of samples."""
+        from collections import Counter
+        from math import log10
+
+        count = len(samples)
+        if self.log:
+            samples = [log10(x) for x in samples if x > 0]
+        total = sum(samples)
+        if total - total != 0:
+            # Some aren't finite, they can't be binned.
+            samples = [x for x in samples if x - x == 0]
+        if self.fixed and samples:
+            low, high = self.low, self.high
+            if min(samples) < low or max(samples) > high:
+                samples = [x for x in samples if low <= x <= high]
+        self.dropped += count - len(samples)
+        if not samples:
+            return
+
+        if self.width:
+            self.counts.update(map(int, map(self.width.__rfloordiv__,
+                                            samples)))
+            return
+        if self.pending is not None:
+            self.pending += samples
+            if len(self.pending) < self.bins:
+                return
+            samples, self.pending = self.pending, None
+            self._start(min(samples), max(samples))
+
+        if not self.fixed:
+            smallest, largest = min(samples), max(samples)
+            if self.smallest is None or smallest < self.smallest:
+                self.smallest = smallest
+            if self.largest is None or largest > self.largest:
+                self.largest = largest
+            while smallest < self.low:
+                self._grow(True)
+            while largest > self.high:
+                self._grow(False)
+
+        size, counts = self.size, self.counts
+        scale = size / (self.high - self.low)
+        np = _numpy()
+        if np is not None:
+            # The same float64 operations, and astype truncates like int().
+            index = ((np.array(samples) - self.low) * scale).astype(np.intp)
+            # The last bin includes the end of the range.
+            hits = np.bincount(np.minimum(index, size - 1), minlength=size)
+            self.counts = list(map(int.__add__, counts, hits.tolist()))
+            return
+        hits = Counter(map(int, map(scale.__mul__,
+                                    map(self.low.__rsub__, samples))))
+        for i, hit in hits.items():
+            counts[i if i < size else size - 1] += hit
+
+    def rows(self):
+        """Return the bins as (categories, data), a row per bin labelled
+           with its range."""
+        if self.pending:
+            samples, self.pending = self.pending, None
+            self._start(min(samples), max(samples))
+            self.add(samples)
+
+        if self.width:
+            if not self.counts:
+                return [], ColumnData()
+            first, last = min(self.counts), max(self.counts)
+            counts = [self.counts[k] for k in range(first, last + 1)]
+            edges = [k * self.width for k in range(first, last + 2)]
+        elif self.counts is None:
+            return [], ColumnData()
+        elif self.fixed:
+            counts = self.counts
+            step = (self.high - self.low) / self.size
+            edges = [self.low + i * step for i in range(self.size)]
+            edges.append(self.high)
+        else:
+            used = [i for i, count in enumerate(self.counts) if count]
+            if not used:
+                return [], ColumnData()
+            # Merge the fine bins from the first sample to the last.
+            group = -(-(used[-1] - used[0] + 1) // self.bins)
+            starts = range(used[0], used[-1] + 1, group)
+            step = (self.high - self.low) / self.size
+            counts = [sum(self.counts[i:i + group]) for i in starts]
+            edges = [self.low + i * step for i in starts]
+            end = starts[-1] + group
+            edges.append(self.high if end >= self.size
+                         else self.low + end * step)
+            # No sample lies beyond those.
+            edges[0] = max(edges[0], self.smallest)
+            edges[-1] = min(edges[-1], self.largest)
+
+        if self.log:
+            edges = [10 ** edge for edge in edges]
+        labels = ['{:g}..{:g}'.format(edges[i], edges[i + 1])
+                  for i in range(len(counts))]
+        return [], ColumnData([array('d', counts)], labels)
+
+def load_histogram(args):
+    """Read the raw samples named in args and count them in bins.
+
+       Returns (categories, data) with a row per bin. When the bins are
+       spread over the range of the samples, a regular file is read twice,
+       for the range, then to count the samples. Anything else (a pipe) is
+       read once, the range growing to fit the samples."""
+    bins = args.get('bins') or DEFAULTS['bins']
+    width, log = args.get('bin_width'), args.get('log_bins')
+    low, high = args.get('range') or (None, None)
+    if width is not None and width <= 0:
+        raise DataError('The width of the bins must be positive')
+    if low is not None and high <= low:
+        raise DataError('The range of the bins is empty')
+    fixed = low is not None
+
+    filename = args['filename']
+    if (not fixed and not width and filename != '-'
+            and os.path.isfile(filename)):
+        # First pass, for the range of the samples which can be binned.
+        for samples in stream_data(args, sample_blocks):
+            if log:
+                samples = [x for x in samples if x > 0]
+            total = sum(samples)
+            if total - total != 0:
+                samples = [x for x in samples if x - x == 0]
+            if not samples:
+                continue
+            smallest, largest = min(samples), max(samples)
+            if low is None or smallest < low:
+                low = smallest
+            if high is None or largest > high:
+                high = largest
+        if low is None:
+            raise DataError('There are no samples')
+
+    histogram = Histogram(bins, low, high, width, log, fixed)
+    for samples in stream_data(args, sample_blocks):
+        histogram.add(samples)
+    categories, data = histogram.rows()
+    if not len(data):
+        raise DataError('There are no samples')
+    return categories, data
+
+# Labels are counted in blocks of this many lines by --top.
+LABEL_BLOCK_ROWS = 1 << 16
+
+def label_blocks(lines, delim=None, size=LABEL_BLOCK_ROWS):
+    """Yield the labels of lines, one per line, counted in blocks.
+
+       Each block is a Counter of the stripped lines, blank ones left out.
+       delim isn't used, a label is the whole line."""
+    from collections import Counter
+    from itertools import islice
+
+    lines = iter(lines)
+    while True:
+        block = list(islice(lines, size))
+        if not block:
+            return
+        counts = Counter(map(str.strip, block))
+        counts.pop('', None)
+        yield counts
+
+class SpaceSaving(object):
+    """Approximate counts of the most frequent labels of a stream, kept in
+       a fixed number of counters (Space-Saving, Metwally et al.).
+
+       A label which isn't counted yet takes over the counter of the least
+       counted one when they're all in use, starting from its count, which
+       is also the most the new count may be over. Counts are then never
+       below the true ones and at most total / size above, and every label
+       occurring more often than that has a counter. Labels are added in
+       weighted blocks, e.g. the Counters of label_blocks."""
+
+    def __init__(self, size):
+        self.size = max(size, 1)
+        self.total = 0
+        # label: [count, most it's overcounted by]
+        self.counts = {}
+        # (count, label) for each counter, the count may be out of date,
+        # lower than the current one.
+        self.heap = []
+
+    def add(self, block):
+        """Count a block of labels, a mapping of labels to occurrences."""
+        import heapq
+
+        counts, heap = self.counts, self.heap
+        new = []
+        for label, count in block.items():
+            counter = counts.get(label)
+            if counter is None:
+                new.append((count, label))
+            else:
+                counter[0] += count
+        self.total += sum(block.values())
+
+        # The most frequent first: they take the free counters, and the
+        # least counted ones when they replace others.
+        new.sort(reverse=True)
+        for count, label in new:
+            if len(counts) < self.size:
+                counts[label] = [count, 0]
+                heapq.heappush(heap, (count, label))
+                continue
+            while True:
+                least, old = heap[0]
+                current = counts[old][0]
+                if current == least:
+                    break
+                heapq.heapreplace(heap, (current, old))
+            heapq.heapreplace(heap, (least + count, label))
+            del counts[old]
+            counts[label] = [least + count, least]
+
+    def least(self):
+        """Return the count of a label without a counter, at most."""
+        if len(self.counts) < self.size:
+            return 0
+        return min(count for count, _ in self.counts.values())
+
+    def merge(self, other):
+        """Add the counts of other, a summary of another part of the
+           stream. The errors add up, so they stay under total / size."""
+        import heapq
+
+        mine, theirs = self.least(), other.least()
+        merged = {}
+        for label in self.counts.keys() | other.counts.keys():
+            count, error = self.counts.get(label, (mine, mine))
+            other_count, other_error = other.counts.get(label,
+                                                        (theirs, theirs))
+            merged[label] = [count + other_count, error + other_error]
+        kept = heapq.nlargest(self.size, merged.items(),
+                              key=lambda item: item[1][0])
+        self.counts = dict(kept)
+        self.heap = [(counter[0], label) for label, counter in kept]
+        heapq.heapify(self.heap)
+        self.total += other.total
+
+    def top(self, k):
+        """Return the k most frequent (label, count), the most first."""
+        import heapq
+
+        return [(label, counter[0]) for label, counter in heapq.nsmallest(
+            k, self.counts.items(), key=lambda item: (-item[1][0], item[0]))]
+
+def top_chunk(job):
+    """Count the labels in a byte range of a file, see SpaceSaving."""
+    import locale
+    import mmap
+
+    filename, start, stop, size = job
+    encoding = locale.getpreferredencoding(False)
+    summary = SpaceSaving(size)
+    with open(filename, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        def lines():
+            # Line by line, so only a block of lines is held at once.
+            mm.seek(start)
+            while mm.tell() < stop:
+                yield mm.readline().decode(encoding)
+
+        for block in label_blocks(lines()):
+            summary.add(block)
+    return summary
+
+def load_top(args):
+    """Count the labels named in args, one per line, and return the top
+       ones as (categories, data), the most frequent first.
+
+       Memory is fixed by the number of counters, enough for top_error:
+       counts are at most that fraction of the lines over. Large files
+       are split in chunks counted by parallel workers."""
+    from math import ceil
+
+    k = args['top']
+    if k < 1:
+        raise DataError('--top needs at least one label')
+    error = args.get('top_error')
+    if error is None:
+        error = DEFAULTS['top_error']
+    if not 0 < error < 1:
+        raise DataError('--top-error must be between 0 and 1')
+    size = max(k, ceil(1 / error))
+
+    summary = SpaceSaving(size)
+    jobs = parse_jobs(args)
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        filename = args['filename']
+        count = max(jobs * 4, os.path.getsize(filename) // EVENTS_CHUNK_SIZE)
+        chunks = [(filename, start, stop, size)
+                  for start, stop in chunk_offsets(filename, count)]
+        with ProcessPoolExecutor(jobs) as executor:
+            for part in executor.map(top_chunk, chunks):
+                summary.merge(part)
+    else:
+        for block in stream_data(args, label_blocks):
+            summary.add(block)
+
+    top = summary.top(k)
+    if not top:
+        raise DataError('There are no labels')
+    return [], ColumnData([array('d', [count for _, count in top])],
+                          [label for label, _ in top])
+
+class RowBuckets(object):
+    """Aggregate a stream of rows into at most max_rows buckets.
+
+       Rows are added to the last bucket until it holds size rows. When
+       there are more than max_rows buckets, neighbours are merged in pairs
+       and size doubles, so memory stays O(max_rows) whatever the input
+       size. Each bucket keeps, per category, the first, last, min, max and
+       sum of its values, which is enough for every aggregate."""
+
+    def __init__(self, max_rows, how='mean'):
+        self.max_rows = max(max_rows, 1)
+        self.how = how
+        self.size = 1
+        # [first label, last label, count, [[first, last, min, max, sum]]]
+        self.buckets = []
+        self.width = None
+        self.ragged = False
+
+    def add(self, label, values):
+        """Add a row to the last bucket."""
+        if self.width is None:
+            self.width = len(values)
+        if len(values) != self.width:
+            self.ragged = True
+            return
+
+        buckets = self.buckets
+        if buckets and buckets[-1][2] < self.size:
+            bucket = buckets[-1]
+            bucket[1] = label
+            bucket[2] += 1
+            for stats, value in zip(bucket[3], values):
+                stats[1] = value
+                if value < stats[2]:
+                    stats[2] = value
+                if value > stats[3]:
+                    stats[3] = value
+                stats[4] += value
+            return
+
+        buckets.append([label, label, 1,
+                        [[v, v, v, v, v] for v in values]])
+        if len(buckets) > self.max_rows:
+            self._merge()
+
+    def _merge(self):
+        """Merge the buckets in pairs and double their size."""
+        merged = []
+        for k in range(0, len(self.buckets) - 1, 2):
+            left, right = self.buckets[k], self.buckets[k + 1]
+            stats = [[a[0], b[1], min(a[2], b[2]), max(a[3], b[3]),
+                      a[4] + b[4]]
+                     for a, b in zip(left[3], right[3])]
+            merged.append([left[0], right[1], left[2] + right[2], stats])
+        if len(self.buckets) % 2:
+            merged.append(self.buckets[-1])
+        self.buckets = merged
+        self.size *= 2
+
+    def label(self, bucket):
+        """Return the label of a bucket, from its first and last rows."""
+        if bucket[2] == 1:
+            return bucket[0]
+        return bucket[0] + '..' + bucket[1]
+
+    def _lttb(self, j):
+        """Pick one value per bucket for the j-th category.
+
+           Like Largest Triangle Three Buckets, the first and last values
+           are kept and each bucket keeps its min or max, whichever makes
+           the largest triangle with the value picked for the previous
+           bucket and the mean of the next one. Extremes survive."""
+        buckets = self.buckets
+        picked = []
+        for k, bucket in enumerate(buckets):
+            stats = bucket[3][j]
+            if k == 0:
+                value = stats[0]
+            elif k == len(buckets) - 1:
+                value = stats[1]
+            else:
+                after = buckets[k + 1]
+                mean = after[3][j][4] / after[2]
+                # With evenly spaced buckets the triangle area only
+                # depends on the distance to the middle of its base.
+                middle = picked[-1] + mean
+                value = max(stats[2], stats[3],
+                            key=lambda v: abs(middle - 2 * v))
+            picked.append(value)
+        return picked
+
+    def to_columns(self):
+        """Return the aggregated rows as a ColumnData."""
+        data = ColumnData()
+        if not self.buckets:
+            return data
+
+        how = self.how
+        if how == 'lttb':
+            columns = [self._lttb(j) for j in range(self.width)]
+        for k, bucket in enumerate(self.buckets):
+            if how == 'lttb':
+                values = [column[k] for column in columns]
+            elif how == 'mean':
+                values = [stats[4] / bucket[2] for stats in bucket[3]]
+            else:
+                index = {'last': 1, 'min': 2, 'max': 3, 'sum': 4}[how]
+                values = [stats[index] for stats in bucket[3]]
+            data.append(self.label(bucket), values)
+        return data
+
+def load_data(args):
+    """Read the categories and the data named in args.
+
+       Nothing is printed or checked. Returns (categories, data), the
+       labels are data.labels. With max_rows set only the aggregated
+       buckets are kept."""
+    if (args.get('events') or args.get('histogram')
+            or args.get('top') is not None
+            or args.get('input_format', 'text') != 'text'):
+        if args.get('events'):
+            categories, data = load_events(args)
+        elif args.get('histogram'):
+            categories, data = load_histogram(args)
+        elif args.get('top') is not None:
+            categories, data = load_top(args)
+        else:
+            categories, data = load_binary(args)
+        if not args.get('max_rows'):
+            return categories, data
+        events = [('categories', categories), ('rows', data)]
+    else:
+        categories = []
+        jobs = parse_jobs(args)
+        if jobs > 1:
+            events = parallel_data(args, jobs)
+        else:
+            events = stream_data(args, iter_blocks)
+
+    if args.get('max_rows'):
+        # Only the buckets are kept, however long the input is.
+        buckets = RowBuckets(args['max_rows'], args.get('aggregate', 'mean'))
+        add = buckets.add
+    else:
+        data = ColumnData()
+        add = data.append
+
+    for kind, value in events:
+        if kind == 'categories':
+            categories = value
+        elif kind == 'rows':
+            if args.get('max_rows'):
+                for i in range(len(value)):
+                    add(value.labels[i], value[i])
+            else:
+                data.extend(value)
+        else:
+            add(*value)
+
+    if args.get('max_rows'):
+        data = buckets.to_columns()
+        data.ragged = buckets.ragged
+
+    return categories, data
 
 def read_data(args):
     """Read data from a file or stdin and returns it.
 
        Filename includes (categories), labels and data.
        We append categories and labels to lists.
-       Data are inserted to a list of lists due to the categories.
+       Data are inserted to a ColumnData, one array per category, which
+       compares equal to the rows as a list of lists.
 
        i.e.
        labels = ['2001', '2002', '2003', ...]
@@ -483,112 +2875,635 @@ def read_data(args):
     if args['title']:
         print('# ' + args['title'] + '\n')
 
-    categories, labels, data, colors = ([] for i in range(4))
-
-    f = sys.stdin if stdin else open(filename, "r")
-    for line in f:
-        line = line.strip()
-        if line:
-            if not line.startswith('#'):
-                if line.find(DELIM) > 0:
-                    cols = line.split(DELIM)
-                else:
-                    cols = line.split()
-
-                # Line contains categories.
-                if line.startswith('@'):
-                    cols[0] = cols[0].replace("@ ", "")
-                    categories = cols
-
-                # Line contains label and values.
-                else:
-                    labels.append(cols[0].strip())
-                    data_points = []
-                    for i in range(1, len(cols)):
-                        data_points.append(float(cols[i].strip()))
-
-                    data.append(data_points)
-    f.close()
+    categories, data = load_data(args)
+    labels = data.labels
 
     # Check that all data are valid. (i.e. There are no missing values.)
     colors = check_data(labels, data, args)
     if categories:
         # Print categories' names above the graph.
-        print_categories(categories, colors)
+        print_categories(categories, colors, tick=tick_marks(args)[0])
 
     return categories, labels, data, colors
 
-def calendar_heatmap(data, labels, args):
-    """Print a calendar heatmap."""
-    if args['color']:
+def diff_frame(previous, lines):
+    """Return the escape sequences which turn the previous frame into lines.
+
+       Only the terminal rows whose contents changed are rewritten, using
+       cursor addressing. Rows left over from a longer frame are cleared."""
+    out = []
+    for row, line in enumerate(lines):
+        if row >= len(previous) or previous[row] != line:
+            out.append(f'\033[{row + 1};1H{line}\033[K')
+    for row in range(len(lines), len(previous)):
+        out.append(f'\033[{row + 1};1H\033[K')
+    return ''.join(out)
+
+class LiveChart(object):
+    """A chart whose data grow as lines are appended, for --follow.
+
+       The extrema of the last category are kept up to date as rows come
+       in, and the scale is only recomputed when they change. A frame
+       draws the most recent rows which fit in the terminal."""
+
+    def __init__(self, args):
+        self.args = args
+        self.data = ColumnData()
+        self.categories = []
+        self.colors = None
+        self.partial = ''
+        self.min_dat = self.max_dat = None
+        self.scale = None
+        self.frame = []
+
+    def feed(self, text):
+        """Parse the complete lines of text and append them.
+
+           Return True if the data changed."""
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        changed = False
+        for line in lines:
+            try:
+                events = list(iter_data([line], self.args['delim'] or None))
+            except ValueError:
+                # A malformed line shouldn't stop the live graph.
+                continue
+            for kind, value in events:
+                if kind == 'categories':
+                    self.categories = value
+                    changed = True
+                elif self.append(*value):
+                    changed = True
+        return changed
+
+    def append(self, label, values):
+        """Append a row and update the extrema. Return True if appended."""
+        if len(self.data) and len(values) != len(self.data.columns):
+            return False
+        if not values:
+            return False
+        if self.colors is None:
+            self.colors = check_data([label], [values], self.args)
+
+        self.data.append(label, values)
+        value = values[-1]
+        if self.min_dat is None or value < self.min_dat:
+            self.min_dat, self.scale = value, None
+        if self.max_dat is None or value > self.max_dat:
+            self.max_dat, self.scale = value, None
+        return True
+
+    def render(self, height):
+        """Return the lines of a frame at most height rows tall."""
+        lines = []
+        if self.args['title']:
+            lines += ['# ' + self.args['title'], '']
+        if self.categories:
+            codes = color_codes(self.colors, len(self.categories))
+            tick = tick_marks(self.args)[0]
+            names = [start + tick + ' ' + category + '  ' + end
+                     for category, (start, end) in zip(self.categories, codes)]
+            lines += [''.join(names), '']
+        if not len(self.data):
+            return lines
+
+        if self.scale is None:
+            self.scale = scaling(self.min_dat, self.max_dat,
+                                 self.args['width'])
+        per_row = 1 if self.args['stacked'] else len(self.data.columns)
+        count = max((height - len(lines)) // per_row, 1)
+        window = self.data.window(-count)
+        normal = ScaledData(window, *self.scale)
+        plan = plan_layout(window.labels, window, self.args, self.colors,
+                           normal, self.min_dat)
+        if self.args['stacked']:
+            rows = stacked_lines(plan)
+        else:
+            rows = horiz_lines(plan)
+        lines += [row.rstrip('\n') for row in rows]
+        return lines[:height]
+
+    def redraw(self, out, height):
+        """Write the changes since the last frame to out."""
+        lines = self.render(height)
+        out.write(diff_frame(self.frame, lines))
+        out.flush()
+        self.frame = lines
+
+def follow(args, out=None):
+    """Draw the graph and keep redrawing it as data are appended.
+
+       Works on a file, like tail -f, or on stdin until it's closed.
+       Redraws happen at most once per interval and only rewrite the rows
+       which changed."""
+    import select
+    import shutil
+    import stat
+    import time
+
+    if args['vertical'] or args['calendar'] or args['different_scale']:
+        print(">> Error: Follow mode only supports horizontal and stacked "
+              "graphs")
+        sys.exit(1)
+
+    if out is None:
+        out = sys.stdout
+    stdin = args['filename'] == '-'
+    f = sys.stdin.buffer if stdin else open(args['filename'], 'rb')
+    fd = f.fileno()
+    live = LiveChart(args)
+    dirty = True
+    last = 0.0
+    # Regular files are polled like tail -f, pipes are read until closed.
+    pipe = not stat.S_ISREG(os.fstat(fd).st_mode)
+    eof = False
+
+    # Clear the screen and hide the cursor.
+    out.write('\033[2J\033[?25l')
+    try:
+        while True:
+            if pipe and not eof:
+                ready, _, _ = select.select([fd], [], [], args['interval'])
+                chunk = os.read(fd, BUFFER_SIZE) if ready else None
+                eof = chunk == b''
+            else:
+                chunk = os.read(fd, BUFFER_SIZE)
+
+            if chunk:
+                dirty = live.feed(chunk.decode('utf-8', 'replace')) or dirty
+            elif not pipe or eof:
+                # Nothing new: wait for the writer like tail -f does.
+                time.sleep(args['interval'])
+
+            now = time.monotonic()
+            if dirty and now - last >= args['interval']:
+                height = shutil.get_terminal_size().lines - 1
+                live.redraw(out, height)
+                dirty, last = False, now
+
+            if eof and not dirty:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if not stdin:
+            f.close()
+        # Leave the cursor below the graph.
+        out.write(f'\033[{len(live.frame) + 1};1H\033[?25h')
+        out.flush()
+
+def fit_line(line, width):
+    """Return line cut or padded with spaces to width terminal columns.
+
+       Escape sequences take no room. Colors are reset at the end of a
+       line which has any."""
+    import re
+
+    parts = re.split(r'(\033\[[0-9;?]*[A-Za-z])', line)
+    out, used = [], 0
+    for i, part in enumerate(parts):
+        if i % 2:
+            out.append(part)
+            continue
+        for ch in part:
+            size = display_width(ch)
+            if used + size > width:
+                break
+            out.append(ch)
+            used += size
+    if len(parts) > 1:
+        out.append('\033[0m')
+    out.append(' ' * (width - used))
+    return ''.join(out)
+
+class Panel(LiveChart):
+    """A chart of a dashboard, fed by its own source.
+
+       It's drawn in a box of the terminal, (top, left, height, width),
+       and only redrawn when its data changed, rewriting the rows of the
+       box which differ."""
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.source = args['filename']
+        self.error = None
+        self.box = None
+        self.dirty = True
+
+    def feed(self, text):
+        changed = super().feed(text)
+        self.dirty = self.dirty or changed
+        return changed
+
+    def append(self, label, values):
+        if self.colors is None:
+            try:
+                self.colors = validate_data([label], [values], self.args)
+            except DataError as e:
+                self.fail(e)
+                return False
+        return super().append(label, values)
+
+    def fail(self, error):
+        """Show error in place of the chart."""
+        self.error = '>> Error: {}'.format(error)
+        self.dirty = True
+
+    def render(self, height):
+        if not self.error and not self.args['calendar']:
+            return super().render(height)
+        lines = ['# ' + self.args['title'], ''] if self.args['title'] else []
+        if self.error:
+            lines.append(self.error)
+        elif len(self.data):
+            out = StringIO()
+            try:
+                calendar_heatmap(self.data, self.data.labels, self.args, out)
+                lines += out.getvalue().rstrip('\n').split('\n')
+            except ValueError as e:
+                # e.g. a label which isn't a date
+                lines.append('>> Error: {}'.format(e))
+        return lines[:height]
+
+    def place(self, box):
+        """Move the panel to box. It's drawn whole the next time."""
+        if box != self.box:
+            self.box, self.frame, self.dirty = box, [], True
+
+    def draw(self):
+        """Return the escape sequences which update the panel on screen.
+
+           Empty if its data didn't change since it was last drawn."""
+        if not self.dirty:
+            return ''
+        top, left, height, width = self.box
+        lines = [fit_line(line, width) for line in self.render(height)]
+        lines += [' ' * width] * (height - len(lines))
+        out = [f'\033[{top + row + 1};{left + 1}H{line}'
+               for row, line in enumerate(lines)
+               if row >= len(self.frame) or self.frame[row] != line]
+        self.frame, self.dirty = lines, False
+        return ''.join(out)
+
+def read_dashboard(path, args):
+    """Return the panels of a dashboard config, a list for each row.
+
+       Each line is a row of panels separated by |. A panel is a source
+       followed by its own options, using the command line syntax, which
+       default to args. Blank lines and # comments are skipped.
+
+       Sources are files, followed like tail -f, FIFOs, or shell commands
+       starting with ! whose output is read until they exit.
+
+       i.e.
+       cpu.dat --title CPU --width 20 | '!./free.sh' --title Memory
+       days.dat --calendar"""
+    import shlex
+
+    defaults = dict(args, files=None, dashboard=None)
+    rows = []
+    with open(path) as f:
+        for line in f:
+            tokens = shlex.split(line, comments=True)
+            panels = []
+            while tokens:
+                if '|' in tokens:
+                    end = tokens.index('|')
+                    panel, tokens = tokens[:end], tokens[end + 1:]
+                else:
+                    panel, tokens = tokens, []
+                parser = build_parser()
+                parser.set_defaults(**defaults)
+                panel = files_args(vars(parser.parse_args(panel)))
+                if panel['filename'] == '-':
+                    raise DataError('A dashboard panel needs a file, a FIFO '
+                                    'or a !command: ' + line.strip())
+                if panel['vertical'] or panel['different_scale']:
+                    raise DataError('Dashboard panels are horizontal, '
+                                    'stacked or calendar graphs')
+                panels.append(Panel(panel))
+            if panels:
+                rows.append(panels)
+    return rows
+
+def dashboard_boxes(rows, columns, lines):
+    """Return the box of each panel of rows in a columns x lines terminal.
+
+       Rows share the height equally, the panels of a row its width, with
+       a blank column between them."""
+    boxes = []
+    height = max(lines // max(len(rows), 1), 1)
+    for i, row in enumerate(rows):
+        width = max((columns - len(row) + 1) // len(row), 1)
+        boxes += [(i * height, j * (width + 1), height, width)
+                  for j in range(len(row))]
+    return boxes
+
+async def source_chunks(source, interval):
+    """Yield the bytes of a dashboard source as they come.
+
+       See read_dashboard for the sources. Files are polled every
+       interval seconds once they're read to the end."""
+    import asyncio
+
+    if source.startswith('!'):
+        from asyncio.subprocess import DEVNULL, PIPE
+
+        process = await asyncio.create_subprocess_shell(
+            source[1:], stdin=DEVNULL, stdout=PIPE)
+        ended = False
+        try:
+            while True:
+                chunk = await process.stdout.read(BUFFER_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+            ended = True
+        finally:
+            # Stopped early, e.g. interrupted. Otherwise it's exiting.
+            if not ended and process.returncode is None:
+                process.kill()
+            await process.wait()
+        return
+
+    loop = asyncio.get_event_loop()
+    # A FIFO would block until it has a writer.
+    fd = os.open(source, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        while True:
+            try:
+                chunk = os.read(fd, BUFFER_SIZE)
+            except BlockingIOError:
+                # A FIFO with a writer but nothing written yet.
+                ready = loop.create_future()
+                loop.add_reader(fd, ready.set_result, None)
+                try:
+                    await ready
+                finally:
+                    loop.remove_reader(fd)
+                continue
+            if chunk:
+                yield chunk
+            else:
+                # The end of a file, or a FIFO without writers.
+                await asyncio.sleep(interval)
+    finally:
+        os.close(fd)
+
+async def run_dashboard(rows, out, interval):
+    """Read the sources of the panels of rows and draw them until they end.
+
+       Sources are read concurrently. Panels whose data changed are
+       redrawn together, in one write per frame, at most once per
+       interval."""
+    import asyncio
+    import shutil
+    import signal
+
+    changed = asyncio.Event()
+    panels = [panel for row in rows for panel in row]
+
+    async def read(panel):
+        try:
+            async for chunk in source_chunks(panel.source, interval):
+                if panel.feed(chunk.decode('utf-8', 'replace')):
+                    changed.set()
+        except OSError as e:
+            panel.fail(e)
+        finally:
+            changed.set()
+
+    readers = [asyncio.ensure_future(read(panel)) for panel in panels]
+    resize = getattr(signal, 'SIGWINCH', None)
+    if resize is not None:
+        asyncio.get_event_loop().add_signal_handler(resize, changed.set)
+    size = None
+    try:
+        while True:
+            if shutil.get_terminal_size() != size:
+                size = shutil.get_terminal_size()
+                out.write('\033[2J')
+                boxes = dashboard_boxes(rows, size.columns, size.lines - 1)
+                for panel, box in zip(panels, boxes):
+                    panel.place(box)
+            out.write(''.join(panel.draw() for panel in panels))
+            out.flush()
+            if all(reader.done() for reader in readers):
+                return
+            await changed.wait()
+            # Changes coming in meanwhile are drawn in the same frame.
+            await asyncio.sleep(interval)
+            changed.clear()
+    finally:
+        if resize is not None:
+            asyncio.get_event_loop().remove_signal_handler(resize)
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+def run_async(coroutine):
+    """Run coroutine in a new event loop and return its result.
+
+       Like asyncio.run, which needs Python 3.7: tasks left when it stops,
+       e.g. on KeyboardInterrupt, are cancelled before the loop closes."""
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        try:
+            all_tasks = getattr(asyncio, 'all_tasks', None) or \
+                asyncio.Task.all_tasks
+            tasks = [task for task in all_tasks(loop) if not task.done()]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(
+                    asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+def dashboard(args, out=None):
+    """Draw the panels of the dashboard config named in args.
+
+       Runs until every source has ended, or until interrupted."""
+    import shutil
+
+    if out is None:
+        out = sys.stdout
+    rows = read_dashboard(args['dashboard'], args)
+
+    # Clear the screen and hide the cursor.
+    out.write('\033[2J\033[?25l')
+    try:
+        run_async(run_dashboard(rows, out, args['interval']))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Leave the cursor below the panels.
+        out.write('\033[{};1H\033[?25h'.format(
+            shutil.get_terminal_size().lines))
+        out.flush()
+
+def select(values, k):
+    """Return the k-th smallest of values (0 based), without sorting.
+
+       Quickselect, O(n) on average. values is reordered."""
+    lo, hi = 0, len(values) - 1
+    while lo < hi:
+        pivot = values[(lo + hi) // 2]
+        i, j = lo, hi
+        while i <= j:
+            while values[i] < pivot:
+                i += 1
+            while values[j] > pivot:
+                j -= 1
+            if i <= j:
+                values[i], values[j] = values[j], values[i]
+                i += 1
+                j -= 1
+        if k <= j:
+            hi = j
+        elif k >= i:
+            lo = i
+        else:
+            break
+    return values[k]
+
+def iso_day(text):
+    """Return the date of a yyyy-mm-dd string, raise ValueError if it isn't
+       one (date.fromisoformat needs Python 3.7)."""
+    from datetime import date
+
+    if (len(text) != 10 or text[4] + text[7] != '--'
+            or not (text[:4] + text[5:7] + text[8:]).isdigit()):
+        raise ValueError('not a yyyy-mm-dd date: {!r}'.format(text))
+    return date(int(text[:4]), int(text[5:7]), int(text[8:]))
+
+def calendar_legend(first, weeks, width=1):
+    """Return the month names over the week columns of a calendar.
+
+       first is the ordinal of the first Monday. Each name is written over
+       the first column of its month, width characters per column; a
+       month shown for a single week at the start is left out if it
+       would overlap the next name."""
+    from datetime import date
+
+    names = []
+    month = None
+    for week in range(weeks):
+        day = date.fromordinal(first + 7 * week)
+        if day.month == month:
+            continue
+        month = day.month
+        column = week * width
+        if column + 3 > weeks * width:
+            break
+        if names and column < names[-1][0] + 4:
+            names.pop()
+        names.append((column, day.strftime('%b')))
+    legend = ''
+    for column, name in names:
+        legend += ' ' * (column - len(legend)) + name
+    return legend
+
+def calendar_levels(cells, max_val, quantiles=False):
+    """Return the three thresholds above which cells get a darker tick.
+
+       By default they are 25, 50 and 75% of max_val. With quantiles they
+       are the quartiles of the non empty cells, so busy and quiet periods
+       both show contrast."""
+    if not quantiles:
+        return max_val * 0.25, max_val * 0.50, max_val * 0.75
+    values = [v for v in cells if v == v]
+    if not values:
+        return max_val, max_val, max_val
+    last = len(values) - 1
+    return tuple(select(values, last * q // 4) for q in (1, 2, 3))
+
+def calendar_heatmap(data, labels, args, out=None):
+    """Print a calendar heatmap to out, stdout by default.
+
+       Dates are mapped once to day numbers in a dense array of cells, a
+       column per week from the Monday before the start date, and each
+       weekday is drawn as a single string."""
+    from datetime import datetime, timedelta
+
+    if out is None:
+        out = sys.stdout
+
+    if args.get('no_color'):
+        colornum = None
+    elif args['color']:
         colornum = AVAILABLE_COLORS.get(args['color'][0])
     else:
         colornum = AVAILABLE_COLORS.get('blue')
+    color = f'\033[{colornum}m' if colornum else ''
 
-    dt_dict = {}
-    for i in range(len(labels)):
-        dt_dict[labels[i]] = data[i][0]
+    values = as_columns(data).column(0)
 
     # get max value
-    max_val = float(max(data)[0])
-
-    tick_1 = "░"
-    tick_2 = "▒"
-    tick_3 = "▓"
-    tick_4 = "█"
+    max_val = float(max(values))
 
+    ticks = [' ', "░", "▒", "▓", "█"]
     if args['custom_tick']:
-        tick_1 = tick_2 = tick_3 = tick_4 = args['custom_tick']
+        ticks[1:] = [args['custom_tick']] * 4
 
-    # check if start day set, otherwise use one year ago
+    # check if start day set, otherwise use one year before the end date
+    # or today
+    end_dt = args.get('end_dt')
+    if end_dt:
+        end_dt = datetime.strptime(end_dt, '%Y-%m-%d')
     if args['start_dt']:
         start_dt = datetime.strptime(args['start_dt'], '%Y-%m-%d')
     else:
-        start = datetime.now()
+        start = end_dt or datetime.now()
         start_dt = datetime(year=start.year-1, month=start.month,
                             day=start.day)
 
     # modify start date to be a Monday, subtract weekday() from day
     start_dt = start_dt - timedelta(start_dt.weekday())
-
-    # TODO: legend doesn't line up properly for all start dates/data
-    # top legend for months
-    sys.stdout.write("     ")
-    for month in range(13):
-        month_dt = datetime(year=start_dt.year, month=start_dt.month, day=1) +\
-                   timedelta(days=month*31)
-        sys.stdout.write(month_dt.strftime("%b") + " ")
-        if args['custom_tick']: #assume custom tick is emoji which is one wider
-            sys.stdout.write(" ")
-
-    sys.stdout.write('\n')
+    weeks = 53
+    if end_dt:
+        weeks = max((end_dt - start_dt).days // 7 + 1, 1)
+
+    # Cells hold the value of each day from start_dt, nan when missing.
+    first = start_dt.toordinal()
+    cells = array('d', [float('nan')]) * (weeks * 7)
+    for label, value in zip(labels, values):
+        try:
+            day = iso_day(label).toordinal() - first
+        except (TypeError, ValueError):
+            continue
+        if 0 <= day < len(cells):
+            cells[day] = value
+
+    low, mid, high = calendar_levels(cells, max_val, args.get('quantiles'))
+
+    # top legend for months, emoji are one wider
+    width = display_width(ticks[1])
+    out.write("     " + calendar_legend(first, weeks, width) + '\n')
 
     for day in range(7):
-        sys.stdout.write(DAYS[day] + ': ')
-        for week in range(53):
-            day_ = start_dt + timedelta(days=day + week*7)
-            day_str = day_.strftime("%Y-%m-%d")
-
-            if day_str in dt_dict:
-                if dt_dict[day_str] > max_val * 0.75:
-                    tick = tick_4
-                elif dt_dict[day_str] > max_val * 0.50:
-                    tick = tick_3
-                elif dt_dict[day_str] > max_val * 0.25:
-                    tick = tick_2
-                else:
-                    tick = tick_1
+        row = []
+        for value in cells[day::7]:
+            if value != value:
+                row.append(ticks[0])
+            elif value > high:
+                row.append(ticks[4])
+            elif value > mid:
+                row.append(ticks[3])
+            elif value > low:
+                row.append(ticks[2])
             else:
-                tick = ' '
-
-            if colornum:
-                sys.stdout.write(f'\033[{colornum}m')
-
-            sys.stdout.write(tick)
-            if colornum:
-                sys.stdout.write('\033[0m')
-
-        sys.stdout.write('\n')
+                row.append(ticks[1])
+        out.write(DAYS[day] + ': '
+                  + sgr_runs((color, tick) for tick in row) + '\n')
 
 
 if __name__ == "__main__":
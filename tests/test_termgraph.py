@@ -1,5 +1,11 @@
+import os
+import struct
+import subprocess
+import sys
+import tempfile
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+from array import array
 from io import StringIO
 from termgraph import termgraph as tg
 
@@ -10,6 +16,130 @@ class TermgraphTest(unittest.TestCase):
     def test_main(self):
         pass
 
+    def test_defaults_match_the_parser(self):
+        assert tg.default_args() == vars(tg.build_parser().parse_args([]))
+        args = tg.init_args(['data/ex1.dat', '--custom-tick', 'x'])
+        assert args['custom_tick'] == 'x'
+        assert tg.TICK == '▇'
+
+    def test_render_returns_the_chart(self):
+        result = tg.render(['a', 'b'], [[1.0], [2.0]], title='T',
+                           custom_tick='x')
+        assert result == '# T\n\na: x 1.00 \nb: xx 2.00 \n\n'
+        result = tg.render([2007, 2008], [[1.0, 2.0], [3.0, 4.0]],
+                           categories=['Boys', 'Girls'], stacked=True)
+        assert result.startswith('\x1b[91m▇ Boys  \x1b[94m▇ Girls  \x1b[0m')
+        assert '2007: \x1b[91m▇\x1b[94m▇▇\x1b[0m 3.00 \n' in result
+        assert (tg.TICK, tg.SM_TICK, tg.DELIM) == ('▇', '▏', ',')
+
+    def test_sgr_runs_switches_colors_only_where_they_change(self):
+        red, blue = '\x1b[91m', '\x1b[94m'
+        assert tg.sgr_runs([(red, 'ab'), (red, 'c'), ('', ' '), (red, 'd'),
+                            (blue, ''), (blue, 'e'), ('', ' 1.00')]) == (
+            '\x1b[91mabc d\x1b[94me\x1b[0m 1.00')
+        assert tg.sgr_runs([('', '  '), (red, ' '), (red, 'x')]) == (
+            '   \x1b[91mx\x1b[0m')
+        assert tg.sgr_runs([('', 'plain')]) == 'plain'
+
+    def test_colored_output_stays_close_to_plain(self):
+        from datetime import date, timedelta
+
+        days = [(date(2017, 1, 2) + timedelta(i)).isoformat()
+                for i in range(364)]
+        values = [[float(i % 10)] for i in range(364)]
+        options = dict(calendar=True, start_dt=days[0], end_dt=days[-1])
+        colored = tg.render(days, values, **options)
+        plain = tg.render(days, values, no_color=True, **options)
+        assert '\x1b' not in plain
+        # One color set and reset per weekday row.
+        assert colored.count('\x1b[') <= 2 * 7
+        assert len(colored.encode()) <= len(plain.encode()) + 2 * 7 * 5
+
+        rows = [[float(i % 7), 1.0, float(i % 3)] for i in range(100)]
+        colored = tg.render([str(i) for i in range(100)], rows,
+                            categories=['a', 'b', 'c'], stacked=True)
+        # At most a color per bar and a reset per line.
+        assert colored.count('\x1b[') <= 4 * 101
+        plain = tg.render([str(i) for i in range(100)], rows,
+                          categories=['a', 'b', 'c'], stacked=True,
+                          no_color=True)
+        assert len(colored.encode()) <= len(plain.encode()) + 4 * 101 * 5
+
+    def test_colors_are_left_out_of_pipes(self):
+        command = [sys.executable, '-m', 'termgraph.termgraph',
+                   'data/ex4.dat', '--stacked']
+        env = dict(os.environ)
+        env.pop('NO_COLOR', None)
+        piped = subprocess.run(command, stdout=subprocess.PIPE, env=env,
+                               universal_newlines=True, check=True).stdout
+        assert '\x1b' not in piped and '▇' in piped
+        forced = subprocess.run(command + ['--force-color'], env=env,
+                                stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True).stdout
+        assert '\x1b[91m' in forced
+        args = tg.resolve_colors(tg.init_args(['--force-color']), StringIO())
+        assert args['no_color'] is False
+        assert tg.resolve_colors(tg.init_args([]), StringIO())['no_color']
+
+    def test_render_writes_to_out(self):
+        out = StringIO()
+        with patch('sys.stdout', new=StringIO()) as stdout:
+            result = tg.render(['a'], [[1.0]], out=out)
+        assert result is None
+        assert out.getvalue() == 'a: ▇ 1.00 \n\n'
+        assert stdout.getvalue() == ''
+
+    def test_render_raises_instead_of_exiting(self):
+        with self.assertRaises(tg.DataError):
+            tg.render(['a', 'b'], [[1.0, 2.0], [3.0]])
+        with self.assertRaises(tg.DataError):
+            tg.render(['a'], [[1.0]], color=['red', 'blue'])
+        with self.assertRaises(TypeError):
+            tg.render(['a'], [[1.0]], colour=['red'])
+
+    def test_render_reports_stage_timings(self):
+        timings = tg.Timings(memory=False)
+        result = tg.render(['a', 'b'], [[1.0, 2.0], [3.0, 4.0]],
+                           timings=timings)
+        assert result == tg.render(['a', 'b'], [[1.0, 2.0], [3.0, 4.0]])
+        assert [r['stage'] for r in timings.stages] == [
+            'validate', 'layout', 'normalize', 'render', 'write']
+        assert timings.stages[0]['rows'] == 2
+        assert timings.stages[0]['cells'] == 4
+        out = StringIO()
+        timings.report(out)
+        assert out.getvalue().startswith('>> validate ')
+        out = StringIO()
+        timings.report(out, 'json')
+        assert '"stage": "write"' in out.getvalue()
+
+        # Without tracemalloc.reset_peak (Python < 3.9) the peak so far.
+        timings = tg.Timings()
+        timings.stop()
+        traced = Mock(spec=['get_traced_memory'])
+        traced.get_traced_memory.return_value = (1024, 4096)
+        with patch.object(timings, 'tracemalloc', traced):
+            with timings.stage('read'):
+                pass
+        assert timings.stages[0]['peak_bytes'] == 4096
+
+    def test_main_times_the_numpy_import_apart(self):
+        with patch('sys.stdout', new=StringIO()), \
+                patch('sys.stderr', new=StringIO()) as err, \
+                patch('sys.argv', ['termgraph', 'data/ex1.dat',
+                                   '--timings']):
+            tg.main()
+        assert err.getvalue().startswith('>> import ')
+
+    def test_import_does_not_load_optional_modules(self):
+        code = ('import sys, termgraph.termgraph; '
+                'print(sorted(m for m in ("argparse", "colorama", "datetime", '
+                '"unicodedata", "select", "shutil") if m in sys.modules))')
+        result = subprocess.run([sys.executable, '-c', code],
+                                stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        assert result.stdout.strip() == '[]'
+
     def test_find_min_returns_lowest_value(self):
         minimum = tg.find_min([[183.32], [231.23], [16.43], [50.21],
                               [508.97], [212.05], [1.0]])
@@ -48,6 +178,77 @@ class TermgraphTest(unittest.TestCase):
         results = tg.normalize(expected, 20000)
         assert results == expected
 
+    def test_normalize_does_not_copy_columns(self):
+        data = tg.ColumnData.from_rows([[183.32], [-10.0], [508.97]])
+        results = tg.normalize(data, 50)
+        assert results.source is data
+        assert results == [[18.625354066709058], [0.0], [50.0]]
+
+    def test_column_data_stores_about_eight_bytes_per_value(self):
+        data = tg.ColumnData()
+        for i in range(10000):
+            data.append(str(i), [float(i), float(-i)])
+        size = sum(sys.getsizeof(column) for column in data.columns)
+        assert size < 9 * 2 * 10000
+        assert data[3] == [3.0, -3.0]
+        assert data.labels[3] == '3'
+
+    def test_column_data_marks_missing_values(self):
+        data = tg.ColumnData()
+        data.append('2007', [183.32, 190.52])
+        data.append('2008', [231.23])
+        assert data.ragged
+        assert len(data) == 2
+
+    def test_column_data_keeps_running_statistics(self):
+        data = tg.ColumnData()
+        data.append('a', [3.0, -1.0])
+        data.append('b', [-2.0, 4.0])
+        data.append('c', [5.0, 0.5])
+        assert (data.mins, data.maxs) == ([-2.0, -1.0], [5.0, 4.0])
+        assert list(data.row_sums()) == [2.0, 2.0, 5.5]
+        more = tg.ColumnData.from_rows([[9.0, -7.0]], ['d'])
+        data.extend(more)
+        assert (data.mins, data.maxs) == ([-2.0, -7.0], [9.0, 4.0])
+        assert list(data.sums) == [2.0, 2.0, 5.5, 2.0]
+        assert (tg.find_min(data), tg.find_max(data)) == (-7.0, 4.0)
+        # Statistics of given columns are computed on first use, with or
+        # without NumPy.
+        for numpy in (tg._numpy(), None):
+            with patch('termgraph.termgraph._NUMPY', numpy):
+                given = tg.ColumnData([array('d', [1.0, -3.0])], ['x', 'y'])
+                assert given.mins is None
+                assert (given.minimum(0), given.maximum(0)) == (-3.0, 1.0)
+                assert list(given.row_sums()) == [1.0, -3.0]
+
+    def test_numpy_ticks_match_pure_python(self):
+        rows = [[183.32, -4.4], [231.23, 50.0], [16.43, 49.99],
+                [-10.0, 7.0], [508.97, 0.0], [0.5, 1e-9]]
+        for width in (50, 600):
+            normal_dat = tg.normalize(tg.ColumnData.from_rows(rows), width)
+            blocks = tg.tick_rows(normal_dat)
+            with patch.object(tg, '_numpy', return_value=None):
+                expected = [[int(v) for v in row]
+                            for row in tg.tick_rows(normal_dat)]
+            assert blocks.tolist() == expected
+
+    def test_chart_without_numpy_prints_the_same(self):
+        args = {'filename': 'data/ex4.dat', 'title': None, 'width': 50,
+                'format': '{:<5.2f}', 'suffix': '', 'no_labels': False,
+                'color': None, 'vertical': False, 'stacked': True,
+                'different_scale': False, 'calendar': False,
+                'start_dt': None, 'custom_tick': '', 'delim': '',
+                'verbose': False, 'version': False}
+        labels = ['2007', '2008', '2009']
+        data = tg.ColumnData.from_rows([[183.32, -190.52], [-231.23, 5.0],
+                                        [16.43, 53.1]])
+        with patch('sys.stdout', new=StringIO()) as output:
+            tg.chart([91, 94], data, args, labels)
+        with patch('sys.stdout', new=StringIO()) as fallback, \
+                patch.object(tg, '_numpy', return_value=None):
+            tg.chart([91, 94], data, args, labels)
+        assert output.getvalue() == fallback.getvalue()
+
     def test_horiz_rows_yields_correct_values(self):
         labels = ['2007', '2008', '2009', '2010', '2011',
                   '2012', '2014']
@@ -144,6 +345,53 @@ class TermgraphTest(unittest.TestCase):
             output = output.getvalue().strip()
             assert output == '▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇'
 
+    def test_horiz_lines_match_horiz_rows_and_print_row(self):
+        labels = ['2007', '2008', '2009', '2010']
+        data = [[183.32, 190.52], [231.23, 5.0], [16.43, -53.1], [0.0, 7.0]]
+        args = {'filename': 'data/ex4.dat', 'title': None, 'width': 50,
+                'format': '{:<5.2f}', 'suffix': 'K', 'no_labels': False,
+                'color': None, 'vertical': False, 'stacked': False,
+                'different_scale': False, 'calendar': False,
+                'start_dt': None, 'custom_tick': '', 'delim': '',
+                'verbose': False, 'version': False}
+        normal_dat = tg.normalize(data, 50)
+        with patch('sys.stdout', new=StringIO()) as output:
+            for row in tg.horiz_rows(labels, data, normal_dat, args, [91, 94]):
+                tg.print_row(*row)
+        plan = tg.plan_layout(labels, data, args, [91, 94])
+        assert ''.join(tg.horiz_lines(plan)) == output.getvalue()
+        plan = tg.plan_layout(labels, data, args, [91, 94], normal_dat)
+        lines = tg.horiz_lines(plan)
+        assert ''.join(lines) == output.getvalue()
+
+    def test_plan_layout_computes_labels_and_formatter_once(self):
+        labels = ['LONG LABEL', 'x']
+        data = [[10.0, 20.0], [-10.0, 20.0]]
+        args = {'filename': '-', 'title': None, 'width': 50,
+                'format': '{:<5.2f}', 'suffix': ' {ms}', 'no_labels': False,
+                'color': None, 'vertical': False, 'stacked': False,
+                'different_scale': True, 'calendar': False,
+                'start_dt': None, 'custom_tick': '', 'delim': '',
+                'verbose': False, 'version': False}
+        with patch.object(tg, 'find_max_label_length',
+                          wraps=tg.find_max_label_length) as label_length:
+            plan = tg.plan_layout(labels, data, args, [91, 94])
+        assert label_length.call_count == 1
+        assert plan.label(1) == 'x         : '
+        assert plan.blank == ' ' * 12
+        assert plan.tail(1.5) == ' 1.50  {ms}'
+        assert len(plan.scales) == 2
+        assert plan.scales[0].val_min == -10.0
+        assert plan.scales[1].codes == [('\x1b[94m', '\x1b[0m')]
+
+    def test_write_lines_buffers_writes(self):
+        out = StringIO()
+        with patch.object(out, 'write', wraps=out.write) as write:
+            tg.write_lines(('x' * 10 + '\n' for _ in range(1000)), out,
+                           buffer_size=4096)
+        assert write.call_count == 3
+        assert out.getvalue() == ('x' * 10 + '\n') * 1000
+
     def test_stacked_graph_prints_correct_graph(self):
         with patch('sys.stdout', new=StringIO()) as output:
             labels = ['2007', '2008', '2009', '2010', '2011', '2012', '2014']
@@ -166,7 +414,7 @@ class TermgraphTest(unittest.TestCase):
             tg.stacked_graph(labels, data, normal_data, len_categories, args,
                              colors)
             output = output.getvalue().strip()
-            assert output == '2007: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[0m[94m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[0m 373.84\n2008: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[0m[94m▏[0m 236.23\n2009: [91m▇▇▇[0m[94m▇▇▇▇▇▇▇▇▇▇▇▇[0m 69.53\n2010: [91m▇▇▇▇▇▇▇▇▇▇▇▇[0m[94m▏[0m 57.21\n2011: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[0m[94m▇[0m 519.42\n2012: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[0m[94m▇▇▇▇[0m 232.25\n2014: [91m▇▇▇▇▇▇[0m[94m▇▇▇▇[0m 50.00'
+            assert output == '2007: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[94m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[0m 373.84\n2008: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[94m▏[0m 236.23\n2009: [91m▇▇▇[94m▇▇▇▇▇▇▇▇▇▇▇▇[0m 69.53\n2010: [91m▇▇▇▇▇▇▇▇▇▇▇▇[94m▏[0m 57.21\n2011: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[94m▇[0m 519.42\n2012: [91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇[94m▇▇▇▇[0m 232.25\n2014: [91m▇▇▇▇▇▇[94m▇▇▇▇[0m 50.00'
 
     def test_stacked_graph_different_label_length_prints_correct_graph(self):
         with patch('sys.stdout', new=StringIO()) as output:
@@ -184,7 +432,7 @@ class TermgraphTest(unittest.TestCase):
             colors = [94, 91]
             tg.chart(colors, data, args, labels)
             output = output.getvalue().strip()
-            assert output == 'LOOOOOOOOOOOOOOOOOOOOOOOOONG LINE: \x1b[94m▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 30.00\nSHORT LINE                       : \x1b[94m▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 30.00'
+            assert output == 'LOOOOOOOOOOOOOOOOOOOOOOOOONG LINE: \x1b[94m▇▇▇▇▇▇▇▇▇▇\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 30.00\nSHORT LINE                       : \x1b[94m▇▇▇▇▇▇▇▇▇▇\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 30.00'
 
     def test_stacked_graph_no_label_prints_no_labels(self):
         with patch('sys.stdout', new=StringIO()) as output:
@@ -208,24 +456,57 @@ class TermgraphTest(unittest.TestCase):
             tg.stacked_graph(labels, data, normal_data, len_categories, args,
                              colors)
             output = output.getvalue().strip()
-            assert output == '\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 373.84\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▏\x1b[0m 236.23\n\x1b[91m▇▇▇\x1b[0m\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 69.53\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▏\x1b[0m 57.21\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇\x1b[0m 519.42\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇▇▇▇\x1b[0m 232.25\n\x1b[91m▇▇▇▇▇▇\x1b[0m\x1b[94m▇▇▇▇\x1b[0m 50.00'
+            assert output == '\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 373.84\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▏\x1b[0m 236.23\n\x1b[91m▇▇▇\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 69.53\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▏\x1b[0m 57.21\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇\x1b[0m 519.42\n\x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇▇▇▇\x1b[0m 232.25\n\x1b[91m▇▇▇▇▇▇\x1b[94m▇▇▇▇\x1b[0m 50.00'
 
-    def test_vertically_returns_correct_result(self):
+    def test_vertical_lines_returns_correct_result(self):
         args = {'filename': 'data/ex2.dat', 'title': None, 'width': 50,
                 'format': '{:<5.2f}', 'suffix': '', 'no_labels': False,
                 'color': None, 'vertical': True, 'stacked': False,
                 'different_scale': False, 'calendar': False, 'start_dt': None,
                 'custom_tick': '', 'delim': '', 'verbose': False,
                 'version': False}
-        value = 2.0
-        num_blocks = 2
-        val_min = 2.0
-        color = None
-        result = tg.vertically(value, num_blocks, val_min, color, args)
-        assert result == [('▇',), ('▇',)]
-
-    def test_print_vertical(self):
-        pass
+        plan = tg.plan_layout(['a', 'bb'], [[2.0], [0.0]], args, [])
+        result = ''.join(tg.vertical_lines(plan))
+        assert result == ('▇\n'
+                          '▇ ▏\n'
+                          '--Values--\n'
+                          '2 0\n'
+                          '. .\n'
+                          '0 0\n'
+                          '0 0\n'
+                          '--Labels--\n'
+                          'a b\n'
+                          '  b\n')
+
+    def test_vertical_lines_groups_multiple_series(self):
+        args = {'filename': 'data/ex4.dat', 'title': None, 'width': 3,
+                'format': '{:.0f}', 'suffix': '', 'no_labels': True,
+                'color': None, 'vertical': True, 'stacked': False,
+                'different_scale': False, 'calendar': False, 'start_dt': None,
+                'custom_tick': '', 'delim': '', 'verbose': False,
+                'version': False}
+        plan = tg.plan_layout(['a', 'b'], [[1.0, 3.0], [2.0, 1.0]], args,
+                              [None, None])
+        result = ''.join(tg.vertical_lines(plan))
+        assert result == (' ▇\n'
+                          ' ▇ ▇\n'
+                          '▇▇ ▇▇\n'
+                          '----Values----\n'
+                          '13 21\n')
+
+    def test_chart_vertical_charts_do_not_share_state(self):
+        args = {'filename': 'data/ex2.dat', 'title': None, 'width': 50,
+                'format': '{:<5.2f}', 'suffix': '', 'no_labels': False,
+                'color': None, 'vertical': True, 'stacked': False,
+                'different_scale': False, 'calendar': False, 'start_dt': None,
+                'custom_tick': '', 'delim': '', 'verbose': False,
+                'version': False}
+        outputs = []
+        for _ in range(2):
+            with patch('sys.stdout', new=StringIO()) as output:
+                tg.chart([], [[2.0], [3.0]], args, ['x', 'y'])
+            outputs.append(output.getvalue())
+        assert outputs[0] == outputs[1]
 
     def test_chart_prints_correct_chart(self):
         with patch('sys.stdout', new=StringIO()) as output:
@@ -305,7 +586,7 @@ class TermgraphTest(unittest.TestCase):
             labels = ['2007', '2008', '2009', '2010', '2011', '2012', '2014']
             tg.chart(colors, data, args, labels)
             output = output.getvalue().strip()
-            assert output == '2007: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 373.84\n2008: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇\x1b[0m 236.23\n2009: \x1b[91m▇▇▇▇\x1b[0m\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 69.53\n2010: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇\x1b[0m 57.21\n2011: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇▇\x1b[0m 519.42\n2012: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇▇▇▇▇\x1b[0m 232.25\n2014: \x1b[91m▇▇▇▇▇▇▇\x1b[0m\x1b[94m▇▇▇▇▇\x1b[0m 50.00'
+            assert output == '2007: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 373.84\n2008: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇\x1b[0m 236.23\n2009: \x1b[91m▇▇▇▇\x1b[94m▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[0m 69.53\n2010: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇\x1b[0m 57.21\n2011: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇▇\x1b[0m 519.42\n2012: \x1b[91m▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇▇\x1b[94m▇▇▇▇▇\x1b[0m 232.25\n2014: \x1b[91m▇▇▇▇▇▇▇\x1b[94m▇▇▇▇▇\x1b[0m 50.00'
 
     def test_check_data_returns_correct_result(self):
         labels = ['2007', '2008', '2009', '2010', '2011', '2012', '2014']
@@ -346,7 +627,7 @@ class TermgraphTest(unittest.TestCase):
         result = tg.check_data(labels, data, args)
         assert result == [91, 94]
 
-    def test_check_data_vertical_multiple_series_same_scale_exits_with_one(self):
+    def test_check_data_vertical_multiple_series_same_scale_is_supported(self):
         labels = ['2007', '2008', '2009', '2010', '2011', '2012', '2014']
         data = [[183.32, 190.52], [231.23, 5.0], [16.43, 53.1], [50.21, 7.0],
                 [508.97, 10.45], [212.05, 20.2], [30.0, 20.0]]
@@ -356,10 +637,8 @@ class TermgraphTest(unittest.TestCase):
                 'different_scale': False, 'calendar': False,
                 'start_dt': None, 'custom_tick': '', 'delim': '',
                 'verbose': False, 'version': False}
-        with self.assertRaises(SystemExit) as cm:
-            tg.check_data(labels, data, args)
-
-        self.assertEqual(cm.exception.code, 1)
+        result = tg.check_data(labels, data, args)
+        assert result == []
 
     def test_check_data_mismatching_color_and_category_count_exits_with_one(self):
         labels = ['2007', '2008', '2009', '2010', '2011', '2012', '2014']
@@ -412,7 +691,7 @@ class TermgraphTest(unittest.TestCase):
             colors = [91, 94]
             tg.print_categories(categories, colors)
             output = output.getvalue().strip()
-            assert output == "\x1b[91m▇ Boys  \x1b[0m\x1b[94m▇ Girls  \x1b[0m"
+            assert output == '\x1b[91m▇ Boys  \x1b[94m▇ Girls  \x1b[0m'
 
     def test_read_data_returns_correct_results(self):
         args = {'filename': 'data/ex4.dat', 'title': None, 'width': 50,
@@ -454,6 +733,578 @@ class TermgraphTest(unittest.TestCase):
             output = output.getvalue().strip()
             assert output == '>> Reading data from data/ex1.dat'
 
+    def test_iter_data_yields_categories_and_rows(self):
+        lines = ['# comment', '', '@ Boys,Girls', '2007,183.32,190.52',
+                 '2008,231.23,5.0']
+        events = list(tg.iter_data(lines))
+        assert events == [('categories', ['Boys', 'Girls']),
+                          ('row', ('2007', [183.32, 190.52])),
+                          ('row', ('2008', [231.23, 5.0]))]
+
+    def test_iter_data_is_lazy(self):
+        def lines():
+            yield '2007 183.32'
+            raise AssertionError('read past the first row')
+
+        events = tg.iter_data(lines())
+        assert next(events) == ('row', ('2007', [183.32]))
+
+    def test_iter_blocks_reads_lines_like_iter_data(self):
+        lines = ['# comment', '@ Boys,Girls', '2007,183.32,190.52',
+                 ' 2008 , 231.23 ,5.0 ', '', '2009 inf 1e3', '2010,nan,-4',
+                 '2011, 7', '2012 1 2 3', '@ One', 'x 1', 'y 2']
+        expected = list(tg.iter_data(lines))
+        for numpy in (tg._numpy(), None):
+            for size in (1, 2, 3, tg.BLOCK_ROWS):
+                with patch('termgraph.termgraph._NUMPY', numpy):
+                    events = list(tg.iter_blocks(lines, size=size))
+                rows = []
+                for kind, value in events:
+                    if kind == 'rows':
+                        mins = [min(column) for column in value.columns]
+                        assert repr(value.mins) == repr(mins)
+                        rows.extend(('row', (label, row)) for label, row
+                                    in zip(value.labels, value))
+                    else:
+                        rows.append((kind, value))
+                assert repr(rows) == repr(expected)
+
+    def test_iter_blocks_reports_line_of_invalid_number(self):
+        lines = ['@ a,b', 'x,1,2', 'y,3, ', 'z,4,5']
+        for numpy in (tg._numpy(), None):
+            with patch('termgraph.termgraph._NUMPY', numpy):
+                with self.assertRaises(tg.ParseError) as context:
+                    list(tg.iter_blocks(lines))
+            assert context.exception.line == 3
+            assert str(context.exception) == "Line 3: invalid number ''"
+
+            # The first invalid number in line order, not column order.
+            with patch('termgraph.termgraph._NUMPY', numpy):
+                with self.assertRaises(tg.ParseError) as context:
+                    list(tg.iter_blocks(['x,1,q', 'y,z,3']))
+            assert context.exception.line == 1
+            assert context.exception.text == 'q'
+
+        path = self.write_temp('bad.dat', b'a,1\nb,2\n' * 50 + b'c,2x\n')
+        with patch('termgraph.termgraph.PARALLEL_MIN_SIZE', 0):
+            args = tg.init_args([path, '--jobs', '2'])
+            with self.assertRaises(tg.ParseError) as context:
+                tg.load_data(args)
+        assert context.exception.line == 101
+
+    def test_stream_data_does_not_print(self):
+        with patch('sys.stdout', new=StringIO()) as output:
+            args = {'filename': 'data/ex4.dat', 'title': 'spaghetti'}
+            events = list(tg.stream_data(args))
+            assert events[0] == ('categories', ['Boys', 'Girls'])
+            assert len(events) == 8
+            assert output.getvalue() == ''
+
+    def test_diff_frame_rewrites_only_changed_rows(self):
+        result = tg.diff_frame(['a', 'b', 'c'], ['a', 'B'])
+        assert result == '\x1b[2;1HB\x1b[K\x1b[3;1H\x1b[K'
+        assert tg.diff_frame(['a', 'b'], ['a', 'b']) == ''
+
+    def test_live_chart_appends_lines_and_rescales_lazily(self):
+        args = {'filename': '-', 'title': None, 'width': 10,
+                'format': '{:<5.2f}', 'suffix': '', 'no_labels': False,
+                'color': None, 'vertical': False, 'stacked': False,
+                'different_scale': False, 'calendar': False,
+                'start_dt': None, 'custom_tick': '', 'delim': '',
+                'verbose': False, 'version': False}
+        live = tg.LiveChart(args)
+        assert live.feed('a 5\nb 1')
+        assert live.render(10) == ['a: ▇▇▇▇▇ 5.00 ']
+        assert live.feed('0\nbad x\n')
+        assert live.render(10) == ['a: ▇▇▇▇▇ 5.00 ', 'b: ▇▇▇▇▇▇▇▇▇▇ 10.00']
+        scale = live.scale
+        assert live.feed('c 7\n')
+        assert live.render(2) == ['b: ▇▇▇▇▇▇▇▇▇▇ 10.00', 'c: ▇▇▇▇▇▇▇ 7.00 ']
+        assert live.scale is scale
+
+    def test_fit_line_counts_columns_without_escapes(self):
+        assert tg.fit_line('abc', 5) == 'abc  '
+        assert tg.fit_line('abcdef', 3) == 'abc'
+        assert tg.fit_line('\x1b[91m▇▇▇\x1b[0m 3', 2) == (
+            '\x1b[91m▇▇\x1b[0m\x1b[0m')
+
+    def test_read_dashboard_lays_out_panels(self):
+        args = tg.init_args(['--width', '10'])
+        with patch('builtins.open', return_value=StringIO(
+                '# rows\na.dat --title A | "!echo b 1" --stacked\n\n'
+                'days.dat --calendar\n')):
+            rows = tg.read_dashboard('dash.cfg', args)
+        assert [[panel.source for panel in row] for row in rows] == [
+            ['a.dat', '!echo b 1'], ['days.dat']]
+        assert rows[0][0].args['title'] == 'A'
+        assert rows[0][1].args['stacked'] and rows[0][1].args['width'] == 10
+        assert tg.dashboard_boxes(rows, 81, 20) == [
+            (0, 0, 10, 40), (0, 41, 10, 40), (10, 0, 10, 81)]
+        with patch('builtins.open', return_value=StringIO('a.dat --vertical')):
+            self.assertRaises(tg.DataError, tg.read_dashboard, 'x', args)
+
+    def test_run_dashboard_draws_each_source_in_its_box(self):
+        args = tg.init_args(['--width', '5'])
+        with patch('builtins.open', return_value=StringIO(
+                '"!printf \'a 1\\nb 2\\n\'" | "!echo x 4" --title X\n'
+                'missing.dat\n')):
+            rows = tg.read_dashboard('dash.cfg', args)
+        out = StringIO()
+        with patch.dict(os.environ, {'COLUMNS': '41', 'LINES': '9'}):
+            tg.run_async(tg.run_dashboard(rows, out, 0.01))
+        output = out.getvalue()
+        assert output.startswith('\x1b[2J')
+        assert '\x1b[1;1Ha: ▇ 1.00' in output
+        assert '\x1b[2;1Hb: ▇▇ 2.00' in output
+        assert '\x1b[1;22H# X' in output
+        assert '\x1b[3;22Hx: ▇▇▇▇ 4.00' in output
+        assert '\x1b[5;1H>> Error: [Errno 2] ' in output
+
+    def test_run_async_cancels_what_is_left(self):
+        import asyncio
+
+        cancelled = []
+
+        async def wait():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def interrupt():
+            asyncio.ensure_future(wait())
+            await asyncio.sleep(0)
+            raise KeyboardInterrupt
+
+        self.assertRaises(KeyboardInterrupt, tg.run_async, interrupt())
+        assert cancelled == [True]
+        assert tg.run_async(asyncio.sleep(0, 'done')) == 'done'
+
+    def test_row_buckets_keep_short_inputs_unchanged(self):
+        for how in tg.AGGREGATES:
+            buckets = tg.RowBuckets(5, how)
+            for i, value in enumerate([3.0, -1.0, 7.5]):
+                buckets.add(str(i), [value])
+            data = buckets.to_columns()
+            assert data.labels == ['0', '1', '2']
+            assert data == [[3.0], [-1.0], [7.5]]
+
+    def test_row_buckets_aggregate_adjacent_rows(self):
+        results = {}
+        for how in tg.AGGREGATES:
+            buckets = tg.RowBuckets(2, how)
+            for i in range(8):
+                buckets.add('r{}'.format(i), [float(i), float(i % 3)])
+                assert len(buckets.buckets) <= 2
+            data = buckets.to_columns()
+            assert data.labels == ['r0..r3', 'r4..r7']
+            results[how] = list(data)
+        assert results['sum'] == [[6.0, 3.0], [22.0, 4.0]]
+        assert results['mean'] == [[1.5, 0.75], [5.5, 1.0]]
+        assert results['min'] == [[0.0, 0.0], [4.0, 0.0]]
+        assert results['max'] == [[3.0, 2.0], [7.0, 2.0]]
+        assert results['last'] == [[3.0, 0.0], [7.0, 1.0]]
+        assert results['lttb'] == [[0.0, 0.0], [7.0, 1.0]]
+
+    def test_row_buckets_lttb_keeps_spikes(self):
+        buckets = tg.RowBuckets(4, 'lttb')
+        for i in range(64):
+            buckets.add(str(i), [100.0 if i == 37 else 1.0])
+        assert [100.0] in buckets.to_columns()
+        buckets = tg.RowBuckets(4, 'mean')
+        for i in range(64):
+            buckets.add(str(i), [100.0 if i == 37 else 1.0])
+        assert [100.0] not in buckets.to_columns()
+
+    def test_read_data_with_max_rows_aggregates(self):
+        with patch('sys.stdout', new=StringIO()):
+            args = {'filename': 'data/ex4.dat', 'title': None, 'width': 50,
+                    'format': '{:<5.2f}', 'suffix': '', 'no_labels': False,
+                    'color': None, 'vertical': False, 'stacked': False,
+                    'different_scale': False, 'calendar': False,
+                    'start_dt': None, 'custom_tick': '', 'delim': '',
+                    'verbose': False, 'version': False, 'max_rows': 4,
+                    'aggregate': 'max'}
+            _, labels, data, _ = tg.read_data(args)
+        assert labels == ['2007..2008', '2009..2010', '2011..2012', '2014']
+        assert data == [[231.23, 190.52], [50.21, 53.1], [508.97, 20.2],
+                        [30.0, 20.0]]
+
+    def test_chunk_offsets_end_after_newlines(self):
+        with open('data/ex4.dat', 'rb') as f:
+            content = f.read()
+        chunks = tg.chunk_offsets('data/ex4.dat', 4)
+        assert chunks[0][0] == 0 and chunks[-1][1] == len(content)
+        for (start, stop), (next_start, _) in zip(chunks, chunks[1:]):
+            assert stop == next_start and content[stop - 1:stop] == b'\n'
+
+    def test_load_data_in_parallel_matches_serial(self):
+        args = tg.init_args(['data/ex4.dat', '--jobs', '1'])
+        expected = tg.load_data(args)
+        with patch('termgraph.termgraph.PARALLEL_MIN_SIZE', 0):
+            args['jobs'] = 2
+            assert tg.parse_jobs(args) == 2
+            categories, data = tg.load_data(args)
+        assert categories == expected[0] == ['Boys', 'Girls']
+        assert data == expected[1]
+        assert data.labels == expected[1].labels
+
+    def write_temp(self, name, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_load_data_reads_f64_columns_with_labels(self):
+        path = self.write_temp('data.f64',
+                               array('d', [1, 2, 3, 10, 20, 30]).tobytes())
+        labels = self.write_temp('labels.txt', b'@ Boys,Girls\nx\ny\nz\n')
+        args = tg.init_args([path, '--input-format', 'f64', '--columns', '2',
+                             '--labels', labels])
+        categories, data = tg.load_data(args)
+        assert categories == ['Boys', 'Girls']
+        assert data == [[1.0, 10.0], [2.0, 20.0], [3.0, 30.0]]
+        assert data.labels == ['x', 'y', 'z']
+        # Contiguous float64 columns view the file instead of copying it.
+        assert all(isinstance(c, memoryview) for c in data.columns)
+
+    def test_load_data_reads_one_label_per_line(self):
+        path = self.write_temp('data.f64', array('d', [1, 2, 3]).tobytes())
+        labels = self.write_temp('labels.txt',
+                                 b'@ Sales\nNew York\n\n# cities\nParis, FR\n'
+                                 b' Oslo \n')
+        args = tg.init_args([path, '--input-format', 'f64',
+                             '--labels', labels])
+        categories, data = tg.load_data(args)
+        assert categories == ['Sales']
+        assert data.labels == ['New York', 'Paris, FR', 'Oslo']
+
+        for content in (b'x\ny\n', b'x\ny\nz\nw\n', b'x\n\xff\nz\n'):
+            args['label_file'] = self.write_temp('labels.txt', content)
+            self.assertRaises(tg.DataError, tg.load_data, args)
+
+    def test_load_data_reads_npy_files(self):
+        header = b"{'descr': '<f8', 'fortran_order': False, 'shape': (3, 2), }"
+        header += b' ' * (117 - len(header)) + b'\n'
+        path = self.write_temp('data.npy', b'\x93NUMPY\x01\x00' +
+                               len(header).to_bytes(2, 'little') + header +
+                               array('d', [1, 2, 3, 4, 5, 6]).tobytes())
+        categories, data = tg.load_data(
+            tg.init_args([path, '--input-format', 'npy']))
+        assert categories == []
+        assert data == [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]
+        assert data.labels == ['0', '1', '2']
+
+    def test_load_data_reads_struct_records(self):
+        records = b''.join(struct.pack('<3sxdi', label, x, y)
+                           for label, x, y in [(b'ab', 1.5, 2), (b'cde', 2.5, 3)])
+        path = self.write_temp('data.tgs', b'TGS1 <3sxdi\n' + records)
+        args = tg.init_args([path, '--input-format', 'struct'])
+        categories, data = tg.load_data(args)
+        assert data == [[1.5, 2.0], [2.5, 3.0]]
+        assert data.labels == ['ab', 'cde']
+        with self.assertRaises(tg.DataError):
+            tg.load_data(dict(args, filename=self.write_temp('bad', b'x\n')))
+
+    def test_day_events_aggregates_per_day(self):
+        lines = [b'# events\n', b'2024-05-02T10:00:00Z,3\n',
+                 b'2024-05-01T09:30:00 2\n', b'2024-05-02T23:59:59Z,4\n',
+                 b'\n']
+        _, data = tg.event_rows(tg.day_events(lines))
+        assert data.labels == ['2024-05-01', '2024-05-02'] and data == [[1.0], [2.0]]
+        _, data = tg.event_rows(tg.day_events(lines, 'sum'))
+        assert data == [[2.0], [7.0]]
+        _, data = tg.event_rows(tg.day_events(lines, 'max'))
+        assert data == [[2.0], [4.0]]
+
+        # Timestamps holding a space, with or without a weight.
+        lines = [b'2024-05-01 10:00:00 3\n', b'2024-05-01 11:00:00\n']
+        assert tg.day_events(lines, 'sum') == {b'2024-05-01': 4.0}
+        assert tg.day_events(lines, 'max', ' ') == {b'2024-05-01': 3.0}
+        with self.assertRaises(tg.ParseError) as raised:
+            tg.day_events(lines + [b'2024-05-02T10:00:00,abc\n'], 'sum')
+        assert raised.exception.line == 3 and raised.exception.text == 'abc'
+
+    def test_day_events_keeps_only_days(self):
+        lines = [b'timestamp,weight\n', b'2024-05-01T10:00:00,2\n',
+                 b'# 2024-05-03 was a holiday\n', b'12345678901 junk\n',
+                 b'2024-02-30T10:00:00,5\n', b'-\n', b'2024-05-01 11:00,3\n']
+        assert tg.day_events(lines) == {b'2024-05-01': 2}
+        with patch('termgraph.termgraph.EVENTS_BATCH_LINES', 2):
+            assert tg.day_events(iter(lines)) == {b'2024-05-01': 2}
+        assert tg.day_events(lines, 'sum') == {b'2024-05-01': 5.0}
+        assert tg.day_events(lines, 'max') == {b'2024-05-01': 3.0}
+
+    def test_load_data_reads_events_in_parallel(self):
+        path = self.write_temp('events.log', b'2024-05-02T10:00:00Z\n' * 50 +
+                               b'2024-05-01T10:00:00Z\n' * 20)
+        args = tg.init_args([path, '--events', 'count', '--jobs', '1'])
+        assert tg.load_data(args) == ([], [[20.0], [50.0]])
+        with patch('termgraph.termgraph.PARALLEL_MIN_SIZE', 0):
+            args['jobs'] = 2
+            categories, data = tg.load_data(args)
+        assert data == [[20.0], [50.0]]
+        assert data.labels == ['2024-05-01', '2024-05-02']
+        args['events'] = 'sum'
+        with open(path, 'ab') as f:
+            f.write(b'2024-05-03T10:00:00Z,x\n')
+        with patch('termgraph.termgraph.PARALLEL_MIN_SIZE', 0), \
+                self.assertRaises(tg.ParseError) as raised:
+            tg.load_data(args)
+        assert raised.exception.line == 71
+
+    def test_sample_blocks_read_the_last_field(self):
+        lines = ['1.5\n', '# samples\n', '\n', 'a 2\n', 'b,3\n', '4 ms\n']
+        self.assertRaises(tg.ParseError, list, tg.sample_blocks(lines))
+        blocks = list(tg.sample_blocks(lines[:5], size=2))
+        assert blocks == [[1.5], [2.0], [3.0]]
+        try:
+            list(tg.sample_blocks(lines, size=2))
+        except tg.ParseError as e:
+            assert e.line == 6
+
+    def test_histogram_bins_a_stream_in_bounded_memory(self):
+        samples = [float(i % 100) for i in range(10000)] + [float('nan')]
+        for numpy in (tg._numpy(), None):
+            with patch('termgraph.termgraph._NUMPY', numpy):
+                fixed = tg.Histogram(4, 0.0, 100.0, fixed=True)
+                fixed.add(samples + [100.0, 150.0, -1.0])
+                _, data = fixed.rows()
+                assert data.labels == ['0..25', '25..50', '50..75', '75..100']
+                assert data == [[2500.0], [2500.0], [2500.0], [2501.0]]
+                assert fixed.dropped == 3
+
+                # The range grows to fit, in blocks like sample_blocks'.
+                growing = tg.Histogram(10)
+                for start in range(0, len(samples), 64):
+                    growing.add(samples[start:start + 64])
+                    assert len(growing.counts) == 10 * tg.HISTOGRAM_RESOLUTION
+                _, data = growing.rows()
+                assert len(data) <= 10
+                assert sum(row[0] for row in data) == 10000
+                assert data.labels[0].startswith('0..')
+                assert data.labels[-1].endswith('..99')
+
+        width = tg.Histogram(0, width=30.0)
+        width.add(samples)
+        _, data = width.rows()
+        assert data.labels == ['0..30', '30..60', '60..90', '90..120']
+        assert data == [[3000.0], [3000.0], [3000.0], [1000.0]]
+
+        log = tg.Histogram(3, log=True)
+        log.add([1.0, 10.0, 100.0, 1000.0, 0.0, -5.0])
+        _, data = log.rows()
+        assert log.dropped == 2
+        assert data.labels == ['1..10', '10..100', '100..1000']
+        assert data == [[1.0], [1.0], [2.0]]
+
+    def test_load_data_counts_samples_in_one_or_two_passes(self):
+        lines = ''.join('{}\n'.format(i % 50) for i in range(1000))
+        path = self.write_temp('samples.txt', lines.encode())
+        args = tg.init_args([path, '--histogram', '--bins', '5'])
+        _, data = tg.load_data(args)
+        assert data.labels == ['0..9.8', '9.8..19.6', '19.6..29.4',
+                               '29.4..39.2', '39.2..49']
+        assert data == [[200.0]] * 5
+        # A pipe is read once.
+        with patch('sys.stdin', new=StringIO(lines)):
+            _, data = tg.load_data(dict(args, filename='-'))
+        assert len(data) <= 5 and sum(row[0] for row in data) == 1000
+        args = tg.init_args([path, '--histogram', '--range', '5', '5'])
+        self.assertRaises(tg.DataError, tg.load_data, args)
+
+    def test_space_saving_bounds_the_counts(self):
+        from collections import Counter
+        import random
+
+        assert list(tg.label_blocks(['a\n', ' b \n', '\n', 'a\n'],
+                                    size=3)) == [{'a': 1, 'b': 1}, {'a': 1}]
+        rng = random.Random(4)
+        labels = [str(rng.paretovariate(1.2) // 1) for _ in range(20000)]
+        exact = Counter(labels)
+        summary = tg.SpaceSaving(50)
+        for start in range(0, len(labels), 1000):
+            summary.add(Counter(labels[start:start + 1000]))
+        assert len(summary.counts) == 50 and summary.total == len(labels)
+        for label, (count, error) in summary.counts.items():
+            assert exact[label] <= count <= exact[label] + error
+            assert error <= len(labels) / 50
+        top = summary.top(5)
+        assert [label for label, _ in top] == [
+            label for label, _ in exact.most_common(5)]
+
+        # Parts of the stream counted apart and merged.
+        left, right = tg.SpaceSaving(50), tg.SpaceSaving(50)
+        left.add(Counter(labels[:12000]))
+        right.add(Counter(labels[12000:]))
+        left.merge(right)
+        assert len(left.counts) == 50 and left.total == len(labels)
+        for label, (count, error) in left.counts.items():
+            assert exact[label] <= count <= exact[label] + error
+            assert error <= len(labels) / 50
+
+    def test_load_data_counts_the_top_labels(self):
+        path = self.write_temp('labels.txt',
+                               b'/a\n/b\n/a\n\n/c\n/a\n/b\n' * 30)
+        args = tg.init_args([path, '--top', '2', '--jobs', '1'])
+        _, data = tg.load_data(args)
+        assert data.labels == ['/a', '/b'] and data == [[90.0], [60.0]]
+        with patch('termgraph.termgraph.PARALLEL_MIN_SIZE', 0), \
+                patch('termgraph.termgraph.EVENTS_CHUNK_SIZE', 16):
+            args['jobs'] = 2
+            _, data = tg.load_data(args)
+        assert data.labels == ['/a', '/b'] and data == [[90.0], [60.0]]
+        for options in (['--top', '0'], ['--top', '2', '--top-error', '0'],
+                        ['--top', '2', '--top-error', '2']):
+            args = tg.init_args([path] + options)
+            self.assertRaises(tg.DataError, tg.load_data, args)
+
+    def test_cache_key_depends_on_options_and_input(self):
+        path = self.write_temp('data.dat', b'a 1\nb 2\n')
+        args = tg.init_args([path])
+        key = tg.cache_key(args)
+        assert tg.cache_key(dict(args, jobs=4, cache='/tmp')) == key
+        assert tg.cache_key(dict(args, width=20)) != key
+        assert tg.cache_key(dict(args, cache_key='content')) != key
+        os.utime(path, ns=(0, 0))
+        assert tg.cache_key(args) != key
+
+    def test_output_cache_evicts_least_recently_used(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = tg.OutputCache(directory.name, max_mib=1)
+        out = StringIO()
+        assert not cache.fetch('aa1', out)
+        cache.store('aa1', 'x' * 400000)
+        cache.store('bb2', 'y' * 400000)
+        os.utime(cache.path('aa1'), ns=(1, 1))
+        os.utime(cache.path('bb2'), ns=(2, 2))
+        assert cache.fetch('aa1', out)
+        assert out.getvalue() == 'x' * 400000
+        cache.store('cc3', 'z' * 400000)
+        assert not os.path.exists(cache.path('bb2'))
+        assert os.path.exists(cache.path('aa1'))
+        assert os.path.exists(cache.path('cc3'))
+
+    def test_init_args_collects_several_files(self):
+        args = tg.init_args(['data/ex1.dat', 'data/ex2.dat'])
+        assert args['files'] == ['data/ex1.dat', 'data/ex2.dat']
+        assert args['filename'] == 'data/ex1.dat'
+        assert tg.init_args([])['files'] == ['-']
+
+    def test_read_manifest_parses_options_per_file(self):
+        args = tg.init_args(['--width', '10'])
+        with patch('builtins.open', return_value=StringIO(
+                '# charts\ndata/ex1.dat --stacked\n\n'
+                'data/ex2.dat data/ex3.dat --suffix "%"\n')):
+            jobs = tg.read_manifest('manifest.txt', args)
+        assert [job['filename'] for job in jobs] == [
+            'data/ex1.dat', 'data/ex2.dat', 'data/ex3.dat']
+        assert [job['stacked'] for job in jobs] == [True, False, False]
+        assert [job['suffix'] for job in jobs] == ['', '%', '%']
+        assert all(job['width'] == 10 for job in jobs)
+
+    def test_batch_keeps_order_and_isolates_errors(self):
+        args = tg.init_args([])
+        jobs = [dict(args, filename=filename)
+                for filename in ('data/ex1.dat', 'missing.dat', 'data/ex2.dat')]
+        expected = tg.render_file(jobs[0])[0]
+        for workers in (1, 2):
+            out, err = StringIO(), StringIO()
+            assert tg.batch(jobs, workers, out=out, err=err) == 1
+            output = out.getvalue()
+            assert output.startswith('==> data/ex1.dat <==\n' + expected +
+                                     '==> missing.dat <==\n'
+                                     '==> data/ex2.dat <==\n')
+            assert '>> Error: missing.dat: ' in err.getvalue()
+            assert '3 files, 1 failed' in err.getvalue()
+
+    def test_server_warms_up_without_gc_freeze(self):
+        from termgraph import server
+
+        # gc.freeze is new in Python 3.7.
+        with patch.dict(sys.modules, gc=Mock(spec=[])):
+            server.warm()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'the server forks')
+    def test_client_draws_with_the_server_or_alone(self):
+        import time
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        env = dict(os.environ,
+                   TERMGRAPH_SOCKET=os.path.join(directory.name, 'tg.sock'))
+        client = [sys.executable, '-c',
+                  'from termgraph.server import client; client()']
+        with open('data/ex4.dat') as f:
+            data = f.read()
+        expected = subprocess.run(
+            [sys.executable, '-m', 'termgraph.termgraph', '--stacked'],
+            input=data, stdout=subprocess.PIPE, universal_newlines=True,
+            check=True).stdout
+
+        # Without a server the client draws the chart itself.
+        result = subprocess.run(client + ['--stacked'], input=data, env=env,
+                                stdout=subprocess.PIPE,
+                                universal_newlines=True)
+        assert (result.returncode, result.stdout) == (0, expected)
+
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'termgraph.server'], env=env)
+        try:
+            for _ in range(100):
+                if os.path.exists(env['TERMGRAPH_SOCKET']):
+                    break
+                time.sleep(0.05)
+            else:
+                self.fail('the server did not start')
+            result = subprocess.run(client + ['--stacked'], input=data,
+                                    env=env, stdout=subprocess.PIPE,
+                                    universal_newlines=True)
+            assert (result.returncode, result.stdout) == (0, expected)
+            result = subprocess.run(client + ['missing.dat'], env=env,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE,
+                                    universal_newlines=True)
+            assert result.returncode == 1
+            assert 'missing.dat' in result.stderr
+        finally:
+            server.terminate()
+            server.wait()
+        assert not os.path.exists(env['TERMGRAPH_SOCKET'])
+
+    def test_select_returns_kth_smallest(self):
+        values = [5.0, 1.0, 4.0, 1.0, 3.0, 9.0, 2.0, 6.0]
+        for k in range(len(values)):
+            assert tg.select(list(values), k) == sorted(values)[k]
+
+    def test_calendar_levels(self):
+        cells = [float('nan'), 1.0, 2.0, 3.0, 4.0, 100.0]
+        assert tg.calendar_levels(cells, 100.0) == (25.0, 50.0, 75.0)
+        assert tg.calendar_levels(cells, 100.0, quantiles=True) == (2.0, 3.0, 4.0)
+
+    def test_calendar_heatmap_spans_several_years(self):
+        out = StringIO()
+        args = {'color': None, 'custom_tick': 'x', 'start_dt': '2016-01-04',
+                'end_dt': '2018-12-30', 'quantiles': False}
+        tg.calendar_heatmap([[1.0], [2.0], [3.0]],
+                            ['2016-01-04', '2017-06-15', '2018-12-30'],
+                            args, out=out)
+        lines = out.getvalue().replace('\x1b[94m', '').replace('\x1b[0m', '')
+        lines = lines.split('\n')
+        # A name per month, over the first week of the month.
+        legend = lines[0][5:].split()
+        assert len(legend) == 36
+        assert legend[:2] == ['Jan', 'Feb'] and legend[-2:] == ['Nov', 'Dec']
+        assert lines[0].index('Jun') == 5 + 22
+        assert lines[0].rindex('Dec') == 5 + 152
+        assert lines[1] == 'Mon: x' + ' ' * 155
+        assert lines[4] == 'Thu: ' + ' ' * 75 + 'x' + ' ' * 80
+        assert lines[7] == 'Sun: ' + ' ' * 155 + 'x'
+
     def test_calendar_heatmap_prints_correct_heatmap(self):
         with patch('sys.stdout', new=StringIO()) as output:
             data = [[4.52], [4.81], [5.05], [2.0], [5.65], [5.15], [3.75],
@@ -481,7 +1332,7 @@ class TermgraphTest(unittest.TestCase):
                     'delim': '', 'verbose': False, 'version': False}
             tg.calendar_heatmap(data, labels, args)
             output = output.getvalue().strip()
-            assert output == 'Jun Jul Aug Sep Oct Nov Dec Jan Feb Mar Apr May Jun \nMon: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nTue: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nWed: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\nThu: \x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▓\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nFri: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nSat: \x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m░\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▓\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m█\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nSun: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m'
+            assert output == 'Jul  Aug Sep Oct  Nov Dec Jan  Feb Mar Apr  May Jun\nMon:    \x1b[94m▒         ▒▒▒                    ▒          ▒  ▒  \x1b[0m\nTue:       \x1b[94m▒                         ▒                    \x1b[0m\nWed:    \x1b[94m▒ ▒    ▒▒    ▒ ▒                 ▒         ▒   ▒▒ \x1b[0m\nThu:  \x1b[94m▒   ▒▒ ▒▒  ▒▓                                       \x1b[0m\nFri:    \x1b[94m▒   ▒  ▒    ▒   ▒                                 \x1b[0m\nSat: \x1b[94m▒▒░  ▒     ▓     █                                ▒  \x1b[0m\nSun:         \x1b[94m▒ ▒     ▒                                    \x1b[0m'
 
     def test_calendar_heatmap_color_prints_correctly(self):
         with patch('sys.stdout', new=StringIO()) as output:
@@ -510,7 +1361,7 @@ class TermgraphTest(unittest.TestCase):
                     'delim': '', 'verbose': False, 'version': False}
             tg.calendar_heatmap(data, labels, args)
             output = output.getvalue().strip()
-            assert output == 'Jun Jul Aug Sep Oct Nov Dec Jan Feb Mar Apr May Jun \nMon: \x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m▒\x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\nTue: \x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\nWed: \x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\nThu: \x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m▓\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\nFri: \x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\nSat: \x1b[91m▒\x1b[0m\x1b[91m▒\x1b[0m\x1b[91m░\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▓\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m█\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\nSun: \x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m▒\x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m\x1b[91m \x1b[0m'
+            assert output == 'Jul  Aug Sep Oct  Nov Dec Jan  Feb Mar Apr  May Jun\nMon:    \x1b[91m▒         ▒▒▒                    ▒          ▒  ▒  \x1b[0m\nTue:       \x1b[91m▒                         ▒                    \x1b[0m\nWed:    \x1b[91m▒ ▒    ▒▒    ▒ ▒                 ▒         ▒   ▒▒ \x1b[0m\nThu:  \x1b[91m▒   ▒▒ ▒▒  ▒▓                                       \x1b[0m\nFri:    \x1b[91m▒   ▒  ▒    ▒   ▒                                 \x1b[0m\nSat: \x1b[91m▒▒░  ▒     ▓     █                                ▒  \x1b[0m\nSun:         \x1b[91m▒ ▒     ▒                                    \x1b[0m'
 
     def test_calendar_heatmap_custom_tick_prints_correctly(self):
         with patch('sys.stdout', new=StringIO()) as output:
@@ -539,10 +1390,18 @@ class TermgraphTest(unittest.TestCase):
                     'delim': '', 'verbose': False, 'version': False}
             tg.calendar_heatmap(data, labels, args)
             output = output.getvalue().strip()
-            assert output == 'Jun  Jul  Aug  Sep  Oct  Nov  Dec  Jan  Feb  Mar  Apr  May  Jun  \nMon: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nTue: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nWed: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\nThu: \x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nFri: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nSat: \x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nSun: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m😮\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m'
+            assert output == 'Jul       Aug     Sep     Oct       Nov     Dec     Jan       Feb     Mar     Apr       May     Jun\nMon:    \x1b[94m😮         😮😮😮                    😮          😮  😮  \x1b[0m\nTue:       \x1b[94m😮                         😮                    \x1b[0m\nWed:    \x1b[94m😮 😮    😮😮    😮 😮                 😮         😮   😮😮 \x1b[0m\nThu:  \x1b[94m😮   😮😮 😮😮  😮😮                                       \x1b[0m\nFri:    \x1b[94m😮   😮  😮    😮   😮                                 \x1b[0m\nSat: \x1b[94m😮😮😮  😮     😮     😮                                😮  \x1b[0m\nSun:         \x1b[94m😮 😮     😮                                    \x1b[0m'
 
     def test_calendar_heatmap_without_start_date_prints_correctly(self):
-        with patch('sys.stdout', new=StringIO()) as output:
+        import datetime
+
+        class Today(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(2018, 6, 21)
+
+        with patch('datetime.datetime', Today), \
+                patch('sys.stdout', new=StringIO()) as output:
             data = [[4.52], [4.81], [5.05], [2.0], [5.65], [5.15], [3.75],
                     [3.72], [5.04], [4.6], [4.77], [5.44], [4.3], [4.84],
                     [6.31], [4.31], [4.15], [5.19], [3.65], [4.01], [7.19],
@@ -568,4 +1427,4 @@ class TermgraphTest(unittest.TestCase):
                     'delim': '', 'verbose': False, 'version': False}
             tg.calendar_heatmap(data, labels, args)
             output = output.getvalue().strip()
-            assert output == 'Sep Oct Nov Dec Jan Feb Mar Apr May Jun Jul Aug Sep \nMon: \x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nTue: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nWed: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nThu: \x1b[94m▓\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nFri: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nSat: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m█\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\nSun: \x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m▒\x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m\x1b[94m \x1b[0m'
+            assert output == 'Jul  Aug Sep Oct  Nov Dec Jan  Feb Mar Apr  May Jun\nMon:     \x1b[94m▒         ▒▒▒                    ▒          ▒  ▒ \x1b[0m\nTue:        \x1b[94m▒                         ▒                   \x1b[0m\nWed:     \x1b[94m▒ ▒    ▒▒    ▒ ▒                 ▒         ▒   ▒▒\x1b[0m\nThu:   \x1b[94m▒   ▒▒ ▒▒  ▒▓                                      \x1b[0m\nFri:     \x1b[94m▒   ▒  ▒    ▒   ▒                                \x1b[0m\nSat:  \x1b[94m▒▒░  ▒     ▓     █                                ▒ \x1b[0m\nSun:          \x1b[94m▒ ▒     ▒                                   \x1b[0m'